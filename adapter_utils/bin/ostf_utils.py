@@ -19,7 +19,10 @@ from adapter_utils import support_utils
 def main():
     cli_args = parse_cli_args()
 
-    support_utils.clean_up_db(cli_args.dbpath)
+    if cli_args.command == 'retention':
+        support_utils.apply_retention(cli_args)
+    else:
+        support_utils.clean_up_db(cli_args.dbpath)
 
 
 if __name__ == '__main__':
@@ -15,7 +15,7 @@
 from sqlalchemy.ext.declarative import declarative_base
 
 from adapter_utils.storage.engine import get_session, get_engine
-from fuel_plugin.ostf_adapter.storage import models
+from fuel_plugin.ostf_adapter.storage import engine, models, retention
 
 
 def clean_up_db(db_path):
@@ -26,3 +26,18 @@ def clean_up_db(db_path):
     with session.begin(subtransactions=True):
         session.query(models.TestSet).delete()
         session.query(models.ClusterState).delete()
+
+
+def apply_retention(cli_args):
+    policies = retention.get_policies(
+        cli_args.policies, cli_args.max_age, cli_args.max_count)
+
+    with engine.contexted_session(cli_args.dbpath) as session:
+        report = retention.apply(session, policies,
+                                 batch_size=cli_args.batch_size,
+                                 archive=cli_args.archive,
+                                 log_dir=cli_args.test_log_dir)
+
+    print ('Removed {test_runs} test runs with {tests} tests, '
+           'reclaimed {bytes} bytes in db and {log_bytes} bytes '
+           'of logs'.format(**report))
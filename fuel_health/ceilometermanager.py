@@ -171,7 +171,8 @@ class CeilometerBaseTest(fuel_health.nmanager.OfficialClientTest):
                 return True  # All good.
             LOG.debug("Waiting for state to get alarm status.")
 
-        if not fuel_health.test.call_until_true(check_status, 600, 10):
+        if not fuel_health.test.call_until_true(check_status, 600, 10,
+                                                name='alarm_status'):
             self.fail("Timed out waiting to become alarm")
 
     def wait_for_instance_metrics(self, meter_name):
@@ -185,7 +186,8 @@ class CeilometerBaseTest(fuel_health.nmanager.OfficialClientTest):
                 return True  # All good.
             LOG.debug("Waiting for while metrics will available.")
 
-        if not fuel_health.test.call_until_true(check_status, 600, 10):
+        if not fuel_health.test.call_until_true(check_status, 600, 10,
+                                                name='instance_metrics'):
 
             self.fail("Timed out waiting to become alarm")
         else:
@@ -101,13 +101,14 @@ def cleanup(cluster_deployment_info):
                 endpoint = manager.config.murano.api_url + '/v1/'
                 headers = {'X-Auth-Token': murano_client.auth_token,
                            'content-type': 'application/json'}
-                environments = requests.get(endpoint + 'environments',
-                                            headers=headers).json()
+                session = requests.Session()
+                environments = session.get(endpoint + 'environments',
+                                           headers=headers).json()
                 for e in environments["environments"]:
                     if e['name'].startswith('ost1_test-'):
                         try:
                             LOG.info('Start environment deletion.')
-                            requests.delete('{0}environments/{1}'.format(
+                            session.delete('{0}environments/{1}'.format(
                                 endpoint, e['id']), headers=headers)
                         except Exception:
                             LOG.warning('Failed to delete murano environment')
@@ -14,24 +14,94 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+import collections
+import functools
+import httplib
+import json
 import logging
+import socket
 import time
 import traceback
+import urllib
 
+import paramiko
+
+from fuel_health import exceptions
 import fuel_health.common.ssh
 
 LOG = logging.getLogger(__name__)
 
+# requests repeated when their response is lost
+IDEMPOTENT_METHODS = ('GET', 'DELETE')
+
+
+def count_running_nodes(cluster_status):
+    """Count running nodes in 'rabbitmqctl cluster_status' output."""
+    substring_ind = cluster_status.find('{running_nodes')
+    result_str = cluster_status[substring_ind:]
+    return result_str.count("rabbit@")
+
+
+def _quote(name):
+    return urllib.quote(name, safe='')
+
+
+def _timed(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.time()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            self.latencies[func.__name__].append(elapsed)
+            LOG.debug('%s on %s took %.3f s', func.__name__, self.host,
+                      elapsed)
+    return wrapper
+
+
+class _TunnelHTTPConnection(httplib.HTTPConnection):
+    """
+    HTTP connection to a port of the remote host carried by a channel
+    of the pooled SSH connection to it.
+    """
+
+    def __init__(self, ssh, port, timeout):
+        httplib.HTTPConnection.__init__(self, 'localhost', port,
+                                        timeout=timeout)
+        self.ssh = ssh
+
+    def connect(self):
+        self.sock = self.ssh._open_channel(
+            'direct-tcpip', ('localhost', self.port), ('127.0.0.1', 0))
+        self.sock.settimeout(self.timeout)
+
 
 class RabbitClient(object):
+    """
+    Client of the RabbitMQ management HTTP API of a controller.
+
+    The API is reached directly when its port on the controller is open,
+    otherwise through the SSH connection to the controller. All requests
+    share one keep-alive HTTP connection, the duration of every operation
+    is recorded in ``latencies``.
+    """
+
     def __init__(self, host, username, key, timeout,
-                 rabbit_username='nova', rabbit_password=None):
+                 rabbit_username='nova', rabbit_password=None,
+                 port=55672, direct=None):
         self.host = host
         self.username = username
         self.key_file = key
         self.timeout = timeout
         self.rabbit_user = rabbit_username
         self.rabbit_password = rabbit_password
+        self.port = port
+        # None means to find out on first request
+        self.direct = direct
+        self.latencies = collections.defaultdict(list)
+        self._connection = None
 
         self.ssh = fuel_health.common.ssh.Client(
             host=self.host,
@@ -41,109 +111,157 @@ class RabbitClient(object):
 
     def list_nodes(self):
         output = self.ssh.exec_command("rabbitmqctl cluster_status")
-        substring_ind = output.find('{running_nodes')
-        result_str = output[substring_ind:]
-        num_node = result_str.count("rabbit@")
-        return num_node
+        return count_running_nodes(output)
 
+    @_timed
     def list_queues(self):
-        query = self._query('queues?"columns=name&sort=name"', header=False)
-        return self._execute(query)
+        queues = self._request('GET', 'queues?columns=name&sort=name')
+        return [queue['name'] for queue in queues]
 
+    @_timed
     def create_queue(self, queue_name):
-        query = self._query(
-            query='queues/%2f/{queue_name}'.format(queue_name=queue_name),
-            type='-XPUT',
-            arguments='-d \'{}\''
-        )
-        return self._execute(query)
+        return self._request('PUT', 'queues/%2f/' + _quote(queue_name), {})
 
+    @_timed
     def delete_queue(self, queue_name):
-        query = self._query(
-            query='queues/%2f/{queue_name}'.format(queue_name=queue_name),
-            type='-XDELETE'
-        )
-        return self._execute(query)
+        return self._request('DELETE', 'queues/%2f/' + _quote(queue_name))
 
+    @_timed
     def create_exchange(self, exchange_name):
-        query = self._query(
-            query='exchanges/%2f/{name}'.format(name=exchange_name),
-            type='-XPUT',
-            arguments='-d \'{"type":"direct"}\''
-        )
-        return self._execute(query)
+        return self._request('PUT', 'exchanges/%2f/' + _quote(exchange_name),
+                             {'type': 'direct'})
 
+    @_timed
     def delete_exchange(self, exchange_name):
-        query = self._query(
-            query='exchanges/%2f/{name}'.format(name=exchange_name),
-            type='-XDELETE'
-        )
-        return self._execute(query)
+        return self._request('DELETE',
+                             'exchanges/%2f/' + _quote(exchange_name))
 
+    @_timed
     def create_binding(self, exchange_name, queue_name, binding_name):
-        query = self._query(
-            query='bindings/%2f/e/{ename}/q/{qname}/{name}'.format(
-                ename=exchange_name,
-                qname=queue_name,
-                name=binding_name
-            ),
-            type='-XPUT'
-        )
-        return self._execute(query)
+        return self._request(
+            'PUT',
+            'bindings/%2f/e/{ename}/q/{qname}/{name}'.format(
+                ename=_quote(exchange_name),
+                qname=_quote(queue_name),
+                name=_quote(binding_name)))
 
+    @_timed
     def delete_binding(self, exchange_name, queue_name, binding_name):
-        query = self._query(
-            query='bindings/%2f/e/{ename}/q/{qname}/{name}'.format(
-                ename=exchange_name,
-                qname=queue_name,
-                name=binding_name
-            ),
-            type='-XDELETE'
-        )
-        return self._execute(query)
+        return self._request(
+            'DELETE',
+            'bindings/%2f/e/{ename}/q/{qname}/{name}'.format(
+                ename=_quote(exchange_name),
+                qname=_quote(queue_name),
+                name=_quote(binding_name)))
 
+    @_timed
     def publish_message(self, message, exchange, binding):
-        query = self._query(
-            query='exchanges/%2f/{ename}/publish'.format(ename=exchange),
-            type='-XPOST',
-            arguments='-d \'{{"properties":{{}},"routing_key":"{bname}",'
-                      '"payload":"{msg}","payload_encoding":"string"}}\''.
-            format(
-                bname=binding,
-                msg=message
-            )
-        )
-        return self._execute(query)
+        """Publish a message, return whether it was routed to a queue."""
+        result = self._request(
+            'POST', 'exchanges/%2f/{ename}/publish'.format(
+                ename=_quote(exchange)),
+            {'properties': {},
+             'routing_key': binding,
+             'payload': message,
+             'payload_encoding': 'string'})
+        return result['routed']
 
+    @_timed
     def get_message(self, queue):
-        query = self._query(
-            query='queues/%2f/{qname}/get'.format(qname=queue),
-            type='-XPOST',
-            arguments='-d \'{"count":1,"requeue":false,"encoding":"auto"}\''
-        )
-        return self._execute(query)
-
-    def _query(self, query, header=True, type='-XGET', arguments=''):
-        start = (header and 'curl -i') or 'curl'
-        return '{start} -u {ruser}:{rpass} -H "content-type:application/json"'\
-               ' {type} {args} http://localhost:55672/api/{query}'.\
-            format(
-                start=start,
-                ruser=self.rabbit_user,
-                rpass=self.rabbit_password,
-                type=type, query=query,
-                args=arguments
-            )
-
-    def _execute(self, query, times=5):
-        exception = None
-        for i in range(times + 1):
+        """Take one message off the queue, return its payload or None."""
+        messages = self._request(
+            'POST', 'queues/%2f/{qname}/get'.format(qname=_quote(queue)),
+            {'count': 1, 'requeue': False, 'encoding': 'auto'})
+        if messages:
+            return messages[0]['payload']
+        return None
+
+    def create_route(self, exchange_name, queue_name, binding_name,
+                     message=None):
+        """
+        Create an exchange and a queue bound to it, then publish the
+        message (if given) through the binding. The requests are sent
+        back to back over the same connection.
+
+        :returns: whether the message was routed, None without message.
+        """
+        self.create_exchange(exchange_name)
+        self.create_queue(queue_name)
+        self.create_binding(exchange_name, queue_name, binding_name)
+        if message is not None:
+            return self.publish_message(message, exchange_name,
+                                        binding_name)
+
+    def delete_route(self, exchange_name, queue_name, binding_name):
+        """Delete what create_route has created."""
+        self.delete_binding(exchange_name, queue_name, binding_name)
+        self.delete_queue(queue_name)
+        self.delete_exchange(exchange_name)
+
+    def latency_summary(self):
+        """
+        :returns: dict operation -> {'calls', 'average', 'max'},
+            times are in seconds.
+        """
+        return dict((name, {'calls': len(times),
+                            'average': sum(times) / len(times),
+                            'max': max(times)})
+                    for name, times in self.latencies.items() if times)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self):
+        if self.direct is None:
+            try:
+                socket.create_connection((self.host, self.port),
+                                         timeout=5).close()
+                self.direct = True
+            except socket.error:
+                self.direct = False
+            LOG.debug('Management API of %s is reached %s', self.host,
+                      'directly' if self.direct else 'through ssh')
+        if self.direct:
+            return httplib.HTTPConnection(self.host, self.port,
+                                          timeout=self.timeout)
+        return _TunnelHTTPConnection(self.ssh, self.port, self.timeout)
+
+    def _request(self, method, path, body=None, retries=2):
+        headers = {
+            'Authorization': 'Basic ' + base64.b64encode('{0}:{1}'.format(
+                self.rabbit_user, self.rabbit_password or '')),
+            'Content-Type': 'application/json'
+        }
+        if body is not None:
+            body = json.dumps(body)
+
+        for attempt in range(retries + 1):
+            sent = False
             try:
-                result = self.ssh.exec_command(query)
-                if result:
-                    return result
-                time.sleep(1)
-            except Exception as exc:
-                exception = exc
+                if self._connection is None:
+                    self._connection = self._connect()
+                self._connection.request(method, '/api/' + path, body,
+                                         headers)
+                sent = True
+                response = self._connection.getresponse()
+                data = response.read()
+                break
+            except (httplib.HTTPException, socket.error,
+                    paramiko.SSHException, EOFError):
+                # keep-alive connection may have been closed by the server
                 LOG.debug(traceback.format_exc())
-        raise exception
+                self.close()
+                # request which may have been processed by the server is
+                # not repeated, unless it is idempotent
+                if attempt == retries or (
+                        sent and method not in IDEMPOTENT_METHODS):
+                    raise
+
+        if response.status >= 400:
+            raise exceptions.AMQPError(data, method=method, path=path,
+                                       status=response.status)
+        if data:
+            return json.loads(data)
+        return None
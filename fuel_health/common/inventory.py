@@ -0,0 +1,132 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Cache of OpenStack listings shared by all tests of a run.
+
+Base test classes look images, flavors, networks, floating IP pools and
+tenants up by name or label again and again. Listings made with the admin
+clients of the managers go through ``cache``; every listing is fetched
+once per TTL for the whole run (a test run is executed by one process)
+and indexed by the looked up attributes.
+
+OfficialClientManager hooks create, update and delete of the listed
+resources, and creation of images from servers, with watch(), so a
+change made by a test drops the stale listing right away.
+"""
+
+import functools
+import threading
+import time
+
+from fuel_health.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+
+
+def normalize_name(name):
+    """Index key matching names regardless of case and outer spaces."""
+    if isinstance(name, basestring):
+        return name.strip().lower()
+    return name
+
+
+class Inventory(object):
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def _entry(self, key, fetch):
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        LOG.debug("Fetching %s listing", key)
+        entry = {'items': list(fetch()),
+                 'fetched_at': time.time(),
+                 'indexes': {}}
+        self._entries[key] = entry
+        return entry
+
+    def list(self, key, fetch):
+        """
+        Return the listing cached under key, calling fetch() to get
+        it when there is none or it is older than the TTL.
+        """
+        with self._lock:
+            return list(self._entry(key, fetch)['items'])
+
+    def find(self, key, fetch, attr, value, normalize=None):
+        """
+        Return the items of the listing whose attr equals value,
+        both compared after normalize when it is given.
+
+        >>cache.find('networks', client.networks.list, 'label', 'net04')
+        """
+        with self._lock:
+            entry = self._entry(key, fetch)
+            index = entry['indexes'].get((attr, normalize))
+            if index is None:
+                index = {}
+                for item in entry['items']:
+                    field = getattr(item, attr, None)
+                    if normalize is not None:
+                        field = normalize(field)
+                    index.setdefault(field, []).append(item)
+                entry['indexes'][(attr, normalize)] = index
+        if normalize is not None:
+            value = normalize(value)
+        return list(index.get(value, []))
+
+    def invalidate(self, *keys):
+        """Drop the given listings, all of them without keys."""
+        with self._lock:
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def watch(self, manager, key, methods=('create', 'update', 'delete')):
+        """
+        Make the given methods of a client resource manager invalidate
+        the listing cached under key.
+        """
+        for name in methods:
+            method = getattr(manager, name, None)
+            if method is None or hasattr(method, 'inventory_key'):
+                continue
+            setattr(manager, name, self._invalidating(method, key))
+
+    def _invalidating(self, method, key):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                # even a failed call may have changed something
+                self.invalidate(key)
+        wrapper.inventory_key = key
+        return wrapper
+
+
+cache = Inventory()
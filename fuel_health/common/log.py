@@ -30,6 +30,32 @@ _DEFAULT_LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 _loggers = {}
 
+_NOT_SET = object()
+
+# NOTE: the name is kept per process rather than per thread on purpose:
+# the runner executes tests one after another, and helper threads started
+# by a test (ssh fan-out, concurrent teardown) must log under its name.
+_test_name = _NOT_SET
+
+
+def set_test_name(name):
+    """
+    Declare the test being run, None between tests.
+
+    Test runners call this around every test and class fixture; once it
+    has been called TestsAdapter stops inspecting the stack to find out
+    which test a record belongs to.
+    """
+    global _test_name
+    _test_name = name
+
+
+def get_test_name():
+    """Return the test declared by the runner, None if there is none."""
+    if _test_name is _NOT_SET:
+        return None
+    return _test_name
+
 
 def getLogger(name='unknown'):
     if len(_loggers) == 0:
@@ -71,6 +97,11 @@ class TestsAdapter(logging.LoggerAdapter):
         return getattr(self.logger, key)
 
     def _get_test_name(self):
+        if _test_name is not _NOT_SET:
+            return _test_name
+        return self._find_test_name()
+
+    def _find_test_name(self):
         frames = inspect.stack()
         for frame in frames:
             binary_name = frame[1]
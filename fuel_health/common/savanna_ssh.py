@@ -16,33 +16,80 @@
 #    under the License.
 
 import logging
-import paramiko
-
-from fuel_health.exceptions import SSHExecCommandFailed
+import threading
+import uuid
 
+from fuel_health.common import ssh
 import fuel_health.config
 
 LOG = logging.getLogger(__name__)
 
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def _get_controller():
+    """
+    Return the client of the first controller, created on first use.
+
+    Its SSH connection lives in fuel_health.common.ssh.connection_pool,
+    which keeps it alive between commands and reconnects when it drops.
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            config = fuel_health.config.FuelConfig()
+            _controller = ssh.Client(
+                config.compute.controller_nodes[0],
+                config.compute.controller_node_ssh_user,
+                key_filename=config.compute.path_to_private_key,
+                timeout=300,
+                channel_timeout=300)
+        return _controller
+
 
 def ssh_command(cmd):
-    config = fuel_health.config.FuelConfig()
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     LOG.debug('Remote ssh commad is "%s"', cmd)
-    try:
-        ssh.connect(hostname=config.compute.controller_nodes[0],
-                    username=config.compute.controller_node_ssh_user,
-                    key_filename=config.compute.path_to_private_key,
-                    timeout=300)
-        _, stdout, stderr = ssh.exec_command(cmd)
-        output = stdout.read()
-        output_err = stderr.read()
-        ssh.close()
-        LOG.debug('Output ssh is "%s%s"', output, output_err)
-        return output, output_err
-    except SSHExecCommandFailed as exc:
-        output_msg = "Command failed."
-        LOG.debug(exc)
-        LOG.debug(output_msg)
-        raise
+    output, output_err = _get_controller().exec_command_output(cmd)
+    LOG.debug('Output ssh is "%s%s"', output, output_err)
+    return output, output_err
+
+
+def ssh_commands(cmds):
+    """
+    Run several commands on the controller in one remote shell, one
+    after another, whatever their exit statuses are.
+
+    :returns: list of standard outputs of the commands.
+    """
+    marker = 'ostf-{0}'.format(uuid.uuid4().hex)
+    script = ' '.join('({0}); echo; echo {1};'.format(cmd, marker)
+                      for cmd in cmds)
+    output, _ = ssh_command(script)
+    # the echo before a marker ends the output of a command with a
+    # newline, it is consumed by the split
+    return output.split('\n{0}\n'.format(marker))[:len(cmds)]
+
+
+def probe_ports(endpoints, connect_timeout=5):
+    """
+    Check from the controller which of the (host, port) endpoints accept
+    TCP connections. All endpoints are probed at once by a single remote
+    command.
+
+    :returns: set of the endpoints found open.
+    """
+    endpoints = list(endpoints)
+    if not endpoints:
+        return set()
+    cmd = ('for ep in {endpoints}; do '
+           '(timeout {timeout} bash -c "echo >/dev/tcp/${{ep%:*}}/${{ep#*:}}" '
+           '2>/dev/null && echo $ep) & '
+           'done; wait'.format(
+               endpoints=' '.join('{0}:{1}'.format(host, port)
+                                  for host, port in endpoints),
+               timeout=connect_timeout))
+    output, _ = ssh_command(cmd)
+    opened = set(line.strip() for line in output.splitlines())
+    return set((host, port) for host, port in endpoints
+               if '{0}:{1}'.format(host, port) in opened)
@@ -15,16 +15,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import atexit
 import logging
 import os
 import select
 import socket
+import threading
 import time
 import traceback
 import warnings
 
 LOG = logging.getLogger(__name__)
 
+from fuel_health.common.utils import misc
 from fuel_health import exceptions
 
 with warnings.catch_warnings():
@@ -32,11 +35,160 @@ with warnings.catch_warnings():
     import paramiko
 
 
+class _PooledConnection(object):
+
+    def __init__(self, ssh):
+        # NOTE: ssh is anything with get_transport() and close(), either a
+        # paramiko.SSHClient or a _ProxiedConnection.
+        self.ssh = ssh
+        self.last_used = time.time()
+        self.channels = []
+
+    @property
+    def transport(self):
+        return self.ssh.get_transport()
+
+    @property
+    def in_use(self):
+        """Number of channels opened on the connection and not closed."""
+        self.channels = [channel for channel in self.channels
+                         if not channel.closed]
+        return len(self.channels)
+
+    def is_active(self):
+        transport = self.transport
+        return transport is not None and transport.is_active()
+
+
+class ConnectionPool(object):
+    """
+    Process-wide cache of established SSH connections.
+
+    Connections are keyed by (host, port, user, credentials), so every
+    Client talking to the same node with the same credentials shares one
+    transport and pays for the TCP, key exchange and auth handshake only
+    once. Each command opens its own channel on that transport.
+
+    Connections unused for more than max_idle seconds are closed on the
+    next pool access; dead transports are dropped and reconnected
+    transparently. A connection is in use, and never closed as idle,
+    while any channel opened by open_channel on it is open.
+    """
+
+    def __init__(self, max_idle=300, keepalive=30):
+        self.max_idle = max_idle
+        self.keepalive = keepalive
+        self._connections = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get_transport(self, key, connect):
+        """
+        Return an active transport for the key.
+
+        :param key: hashable connection key.
+        :param connect: zero argument callable returning a connected
+            paramiko.SSHClient, used when there is no live connection.
+        """
+        return self._get_connection(key, connect).transport
+
+    def open_channel(self, key, connect, kind='session', *args):
+        """
+        Open a channel on the transport for the key, the connection is
+        in use until the channel is closed.
+        """
+        connection = self._get_connection(key, connect)
+        channel = connection.transport.open_channel(kind, *args)
+        with self._lock:
+            connection.channels.append(channel)
+        return channel
+
+    def _get_connection(self, key, connect):
+        with self._lock:
+            self._evict_idle()
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # NOTE: connecting is done under the per-key lock only, so slow
+        # handshakes to one host do not block clients of other hosts.
+        with key_lock:
+            connection = self._connections.get(key)
+            if connection is not None and not connection.is_active():
+                LOG.debug("Pooled SSH connection to %s is dead, "
+                          "reconnecting", key[0])
+                self.discard(key)
+                connection = None
+            if connection is None:
+                connection = _PooledConnection(connect())
+                if self.keepalive:
+                    connection.transport.set_keepalive(self.keepalive)
+                with self._lock:
+                    self._connections[key] = connection
+            connection.last_used = time.time()
+            return connection
+
+    def discard(self, key):
+        """Close and forget the connection for the key, if any."""
+        with self._lock:
+            connection = self._connections.pop(key, None)
+        if connection is not None:
+            self._close(connection)
+
+    def close_all(self):
+        with self._lock:
+            connections = self._connections.values()
+            self._connections = {}
+        for connection in connections:
+            self._close(connection)
+
+    def _evict_idle(self):
+        now = time.time()
+        for key, connection in self._connections.items():
+            if connection.in_use:
+                # idle time counts from the last channel closed
+                connection.last_used = now
+            elif connection.last_used < now - self.max_idle:
+                LOG.debug("Closing idle SSH connection to %s", key[0])
+                del self._connections[key]
+                self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.ssh.close()
+        except Exception:
+            LOG.debug(traceback.format_exc())
+
+
+class _ProxiedConnection(object):
+    """SSH transport to a VM tunnelled through a jump host channel."""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.transport.close()
+
+
+connection_pool = ConnectionPool()
+atexit.register(connection_pool.close_all)
+
+# Transports to instances reached through a controller, keyed by the
+# controller connection key plus (vm ip, user, password). Tests owning
+# the instances should call close_all() when tearing them down.
+vm_connection_pool = ConnectionPool()
+atexit.register(vm_connection_pool.close_all)
+
+
 class Client(object):
 
     def __init__(self, host, username, password=None, timeout=300, pkey=None,
-                 channel_timeout=70, look_for_keys=False, key_filename=None):
+                 channel_timeout=70, look_for_keys=False, key_filename=None,
+                 port=22):
         self.host = host
+        self.port = port
         self.username = username
         self.password = password
         if isinstance(pkey, basestring):
@@ -51,6 +203,13 @@ class Client(object):
         self.timeout = int(timeout)
         self.channel_timeout = float(channel_timeout)
         self.buf_size = 1024
+        self.max_buf_size = 65536
+
+    @property
+    def _pool_key(self):
+        fingerprint = self.pkey.get_fingerprint() if self.pkey else None
+        return (self.host, self.port, self.username, self.password,
+                self.key_filename, fingerprint)
 
     def _get_key_from_file(self, path):
         f_path = os.popen('ls %s' % path, 'r').read().strip('\n')
@@ -68,7 +227,8 @@ class Client(object):
 
         while not self._is_timed_out(self.timeout, _start_time):
             try:
-                ssh.connect(self.host, username=self.username,
+                ssh.connect(self.host, port=self.port,
+                            username=self.username,
                             password=self.password,
                             look_for_keys=self.look_for_keys,
                             key_filename=self.key_filename,
@@ -87,6 +247,51 @@ class Client(object):
                                         key_filename=self.key_filename)
         return ssh
 
+    def _open_channel(self, kind='session', *args):
+        """
+        Open a channel on the pooled transport to the host.
+
+        If the pooled transport turns out to be broken the connection is
+        dropped from the pool and the channel is opened once more on a
+        freshly established one.
+        """
+        try:
+            return connection_pool.open_channel(
+                self._pool_key, self._get_ssh_connection, kind, *args)
+        except (paramiko.SSHException, EOFError, socket.error):
+            LOG.debug(traceback.format_exc())
+            connection_pool.discard(self._pool_key)
+            return connection_pool.open_channel(
+                self._pool_key, self._get_ssh_connection, kind, *args)
+
+    def _connect_to_vm(self, vm, user, password):
+        channel = self._open_channel('direct-tcpip', (vm, 22), (self.host, 0))
+        transport = paramiko.Transport(channel)
+        try:
+            transport.start_client()
+            transport.auth_password(user, password)
+        except Exception:
+            transport.close()
+            raise
+        return _ProxiedConnection(transport)
+
+    def _open_vm_session(self, vm, user, password):
+        """
+        Open a session on the cached transport to the VM, establishing the
+        tunnel through this host first if there is no live one.
+        """
+        key = self._pool_key + (vm, user, password)
+
+        def connect():
+            return self._connect_to_vm(vm, user, password)
+
+        try:
+            return vm_connection_pool.open_channel(key, connect)
+        except (paramiko.SSHException, EOFError, socket.error):
+            LOG.debug(traceback.format_exc())
+            vm_connection_pool.discard(key)
+            return vm_connection_pool.open_channel(key, connect)
+
     def exec_longrun_command(self, cmd):
         """
         Execute the specified command on the server.
@@ -97,10 +302,10 @@ class Client(object):
 
         :returns: data read from standard output of the command.
         """
-        s = self._get_ssh_connection()
-        _, stdout, stderr = s.exec_command(cmd)
-        res = stdout.read()
-        s.close()
+        channel = self._open_channel()
+        channel.exec_command(cmd)
+        res = channel.makefile('rb', -1).read()
+        channel.close()
         return res
 
     def _is_timed_out(self, timeout, start_time):
@@ -121,27 +326,16 @@ class Client(object):
             LOG.debug(traceback.format_exc())
             return
 
-    def exec_command(self, cmd):
+    def _read_channel(self, channel, cmd):
         """
-        Execute the specified command on the server.
+        Yield (stdout, stderr) chunk pairs read from the channel.
 
-        Note that this method is reading whole command outputs to memory, thus
-        shouldn't be used for large outputs.
-
-        :returns: data read from standard output of the command.
-        :raises: SSHExecCommandFailed if command returns nonzero
-                 status. The exception contains command status stderr content.
+        The receive buffer starts at buf_size and doubles, up to
+        max_buf_size, every time a read fills it completely, so chatty
+        commands are drained in a few large reads instead of many 1 KB
+        ones. Either element of a pair may be None.
         """
-        ssh = self._get_ssh_connection()
-        transport = ssh.get_transport()
-        channel = transport.open_session()
-        channel.get_pty()
-        channel.fileno()  # Register event pipe
-        channel.exec_command(cmd)
-        channel.shutdown_write()
-        out_data = []
-        err_data = []
-
+        out_size = err_size = self.buf_size
         select_params = [channel], [], [], self.channel_timeout
         while True:
             ready = select.select(*select_params)
@@ -153,20 +347,136 @@ class Client(object):
                 continue
             out_chunk = err_chunk = None
             if channel.recv_ready():
-                out_chunk = channel.recv(self.buf_size)
-                out_data += out_chunk,
+                out_chunk = channel.recv(out_size)
+                if len(out_chunk) == out_size:
+                    out_size = min(out_size * 2, self.max_buf_size)
             if channel.recv_stderr_ready():
-                err_chunk = channel.recv_stderr(self.buf_size)
-                err_data += err_chunk,
-            if channel.closed and not err_chunk and not out_chunk:
+                err_chunk = channel.recv_stderr(err_size)
+                if len(err_chunk) == err_size:
+                    err_size = min(err_size * 2, self.max_buf_size)
+            if out_chunk or err_chunk:
+                yield out_chunk, err_chunk
+            elif channel.closed:
                 break
-        exit_status = channel.recv_exit_status()
+
+    def _start_command(self, cmd):
+        channel = self._open_channel()
+        channel.get_pty()
+        channel.fileno()  # Register event pipe
+        channel.exec_command(cmd)
+        channel.shutdown_write()
+        return channel
+
+    def exec_command(self, cmd):
+        """
+        Execute the specified command on the server.
+
+        Note that this method is reading whole command outputs to memory, thus
+        shouldn't be used for large outputs, see exec_command_stream.
+
+        :returns: data read from standard output of the command.
+        :raises: SSHExecCommandFailed if command returns nonzero
+                 status. The exception contains command status stderr content.
+        """
+        channel = self._start_command(cmd)
+        out_data = []
+        err_data = []
+        try:
+            for out_chunk, err_chunk in self._read_channel(channel, cmd):
+                if out_chunk:
+                    out_data += out_chunk,
+                if err_chunk:
+                    err_data += err_chunk,
+            exit_status = channel.recv_exit_status()
+        finally:
+            channel.close()
         if 0 != exit_status:
             raise exceptions.SSHExecCommandFailed(
                 command=cmd, exit_status=exit_status,
                 strerror=''.join(err_data).join(out_data))
         return ''.join(out_data)
 
+    def exec_command_output(self, cmd):
+        """
+        Execute the specified command on the server without a pty, so
+        its standard output and error are kept apart.
+
+        :returns: (stdout, stderr) of the command, whatever its exit
+            status is.
+        """
+        channel = self._open_channel()
+        channel.fileno()  # Register event pipe
+        out_data = []
+        err_data = []
+        try:
+            channel.exec_command(cmd)
+            channel.shutdown_write()
+            for out_chunk, err_chunk in self._read_channel(channel, cmd):
+                if out_chunk:
+                    out_data += out_chunk,
+                if err_chunk:
+                    err_data += err_chunk,
+        finally:
+            channel.close()
+        return ''.join(out_data), ''.join(err_data)
+
+    def exec_command_stream(self, cmd, lines=False, max_bytes=None,
+                            stop_when=None):
+        """
+        Execute the specified command on the server and yield its standard
+        output as it arrives, without keeping it in memory.
+
+        Closing the generator, hitting max_bytes or matching stop_when
+        closes the channel; the exit status is checked only when the
+        command ran to completion.
+
+        :param lines: yield complete lines (with line endings) instead of
+            raw chunks.
+        :param max_bytes: stop after this many bytes of output were yielded.
+        :param stop_when: predicate called with every yielded chunk or
+            line; output stops right after the first one it accepts,
+            e.g. ``lambda line: 'XXX' in line``.
+        :raises: SSHExecCommandFailed if the command completed with
+                 nonzero status. The exception contains stderr content.
+        """
+        channel = self._start_command(cmd)
+        err_data = []
+        err_size = 0
+        sent = 0
+        tail = ''
+        try:
+            for out_chunk, err_chunk in self._read_channel(channel, cmd):
+                if err_chunk and err_size < self.max_buf_size:
+                    err_data += err_chunk,
+                    err_size += len(err_chunk)
+                if not out_chunk:
+                    continue
+                if lines:
+                    pieces = (tail + out_chunk).splitlines(True)
+                    tail = ''
+                    # a trailing \r may be the first half of \r\n
+                    if not pieces[-1].endswith('\n'):
+                        tail = pieces.pop()
+                else:
+                    pieces = [out_chunk]
+                for piece in pieces:
+                    if max_bytes is not None:
+                        piece = piece[:max_bytes - sent]
+                    sent += len(piece)
+                    yield piece
+                    if ((max_bytes is not None and sent >= max_bytes) or
+                            (stop_when is not None and stop_when(piece))):
+                        return
+            if tail:
+                yield tail[:None if max_bytes is None else max_bytes - sent]
+            exit_status = channel.recv_exit_status()
+        finally:
+            channel.close()
+        if 0 != exit_status:
+            raise exceptions.SSHExecCommandFailed(
+                command=cmd, exit_status=exit_status,
+                strerror=''.join(err_data))
+
     def test_connection_auth(self):
         """Returns true if ssh can connect to server."""
         try:
@@ -187,40 +497,21 @@ class Client(object):
         :returns: data read from standard output of the command.
         :raises: SSHExecCommandFailed if command returns nonzero
             status. The exception contains command status stderr content."""
-        ssh = self._get_ssh_connection()
-        _intermediate_transport = ssh.get_transport()
-        _intermediate_channel = \
-            _intermediate_transport.open_channel('direct-tcpip',
-                                                 (vm, 22),
-                                                 (self.host, 0))
-        transport = paramiko.Transport(_intermediate_channel)
-        transport.start_client()
-        transport.auth_password(user, password)
-        channel = transport.open_session()
-        channel.exec_command(command)
-        exit_status = channel.recv_exit_status()
-        channel.shutdown_write()
+        channel = self._open_vm_session(vm, user, password)
         out_data = []
         err_data = []
+        try:
+            channel.exec_command(command)
+            exit_status = channel.recv_exit_status()
+            channel.shutdown_write()
 
-        select_params = [channel], [], [], self.channel_timeout
-        while True:
-            ready = select.select(*select_params)
-            if not any(ready):
-                raise exceptions.TimeoutException(
-                    "Command: '{0}' executed on host '{1}'.".format(
-                        command, self.host))
-            if not ready[0]:        # If there is nothing to read.
-                continue
-            out_chunk = err_chunk = None
-            if channel.recv_ready():
-                out_chunk = channel.recv(self.buf_size)
-                out_data += out_chunk,
-            if channel.recv_stderr_ready():
-                err_chunk = channel.recv_stderr(self.buf_size)
-                err_data += err_chunk,
-            if channel.closed and not err_chunk and not out_chunk:
-                break
+            for out_chunk, err_chunk in self._read_channel(channel, command):
+                if out_chunk:
+                    out_data += out_chunk,
+                if err_chunk:
+                    err_data += err_chunk,
+        finally:
+            channel.close()
         if 0 != exit_status:
             raise exceptions.SSHExecCommandFailed(
                 command=command, exit_status=exit_status,
@@ -229,3 +520,98 @@ class Client(object):
 
     def close_ssh_connection(self, connection):
         connection.close()
+
+
+class HostResult(object):
+    """Outcome of a command executed on a single host by exec_on_hosts."""
+
+    def __init__(self, host, command):
+        self.host = host
+        self.command = command
+        self.output = None
+        self.error = None
+        self.duration = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<HostResult {0}: {1} in {2:.2f}s>'.format(
+            self.host, 'ok' if self.ok else 'failed', self.duration)
+
+
+class FanOutResult(dict):
+    """Mapping of host to HostResult with a few summary helpers."""
+
+    @property
+    def outputs(self):
+        return dict((host, result.output)
+                    for host, result in self.items() if result.ok)
+
+    @property
+    def errors(self):
+        return dict((host, result.error)
+                    for host, result in self.items() if not result.ok)
+
+    @property
+    def failed(self):
+        return bool(self.errors)
+
+    def raise_for_errors(self):
+        """Raise SSHFanOutFailed if the command failed on any host."""
+        errors = self.errors
+        if errors:
+            raise exceptions.SSHFanOutFailed(
+                '\n'.join('{0}: {1}'.format(host, error)
+                          for host, error in sorted(errors.items())),
+                hosts=', '.join(sorted(errors)))
+
+
+def exec_on_hosts(hosts, command, username, password=None,
+                  key_filename=None, timeout=300, max_workers=10,
+                  raise_on_error=False, **client_kwargs):
+    """
+    Execute a command on many hosts concurrently.
+
+    :param hosts: list of host addresses.
+    :param command: the command to run on every host, a dict mapping
+        host to its own command, or a callable taking the host and
+        returning the command.
+    :param max_workers: upper bound on the number of hosts handled at
+        the same time.
+    :param raise_on_error: raise SSHFanOutFailed if any host failed.
+    :returns: FanOutResult with a HostResult per host holding the output
+        or the error and the time the command took.
+    """
+    if isinstance(command, dict):
+        get_command = command.get
+    elif callable(command):
+        get_command = command
+    else:
+        def get_command(host):
+            return command
+
+    results = FanOutResult()
+    for host in hosts:
+        results[host] = HostResult(host, get_command(host))
+
+    def run(result):
+        start = time.time()
+        try:
+            client = Client(result.host, username, password=password,
+                            key_filename=key_filename, timeout=timeout,
+                            **client_kwargs)
+            result.output = client.exec_command(result.command)
+        except Exception as exc:
+            LOG.debug(traceback.format_exc())
+            result.error = exc
+        result.duration = time.time() - start
+        LOG.debug('Command %r on %s finished in %.2f s',
+                  result.command, result.host, result.duration)
+
+    misc.run_concurrently(run, results.values(), max_workers)
+
+    if raise_on_error:
+        results.raise_for_errors()
+    return results
@@ -18,6 +18,7 @@ import signal
 import traceback
 
 from fuel_health.common import log as logging
+from fuel_health.common import waiters
 
 LOG = logging.getLogger(__name__)
 
@@ -214,13 +215,18 @@ class timeout(object):
     def __init__(self, timeout, action):
         self.timeout = timeout
         self.action = action
+        # waits inside the context give up a moment before the alarm fires
+        # so that they can report their own failure
+        self.deadline = waiters.deadline(max(timeout - 1, timeout * 0.9))
 
     def __enter__(self):
+        self.deadline.__enter__()
         signal.signal(signal.SIGALRM, _raise_TimeOut)
         signal.alarm(self.timeout)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         signal.alarm(0)  # disable the alarm
+        self.deadline.__exit__(exc_type, exc_val, exc_tb)
         if exc_type is not TimeOutError:
             return False  # never swallow other exceptions
         else:
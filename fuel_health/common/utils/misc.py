@@ -15,6 +15,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import Queue
+import threading
+
 
 def singleton(cls):
     """Simple wrapper for classes that should only have a single instance."""
@@ -25,3 +28,35 @@ def singleton(cls):
             instances[cls] = cls()
         return instances[cls]
     return getinstance
+
+
+def run_concurrently(func, items, max_workers=10):
+    """
+    Call func(item) for every item using at most max_workers threads and
+    wait until all calls are done.
+
+    Exceptions raised by func are not handled here, func is expected to
+    record its own outcome.
+    """
+    tasks = Queue.Queue()
+    for item in items:
+        tasks.put(item)
+
+    def worker():
+        while True:
+            try:
+                item = tasks.get_nowait()
+            except Queue.Empty:
+                return
+            func(item)
+
+    workers = [threading.Thread(target=worker)
+               for _ in range(min(max_workers, tasks.qsize()))]
+    for thread in workers:
+        thread.daemon = True
+        thread.start()
+    for thread in workers:
+        # NOTE: join with a timeout keeps the main thread responsive to
+        # signals, which FuelTestAssertMixin.verify relies on.
+        while thread.is_alive():
+            thread.join(0.1)
@@ -0,0 +1,273 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Polling of OpenStack resources until a condition holds.
+
+A Waiter probes the condition right away, then sleeps with exponential
+backoff (plus some jitter, so parallel waiters do not poll in lockstep)
+up to the configured interval. A wait never outlives the innermost
+enclosing deadline() context, which lets FuelTestAssertMixin.verify pass
+its time limit down to every wait performed inside the verified call.
+
+Every finished wait is recorded in STATS; summary() aggregates them per
+wait name to help tuning the intervals, the storage plugin of the adapter
+logs it after every test.
+"""
+
+import collections
+import random
+import threading
+import time
+
+from fuel_health.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+STATS = collections.deque(maxlen=1000)
+
+_local = threading.local()
+
+
+class WaitStats(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.probes = 0
+        self.elapsed = 0.0
+        self.succeeded = False
+        self.cancelled = False
+
+    def __repr__(self):
+        return ('<WaitStats {0}: {1} after {2} probes in {3:.1f}s>'.format(
+            self.name, 'succeeded' if self.succeeded else 'failed',
+            self.probes, self.elapsed))
+
+
+def current_deadline():
+    """Return the innermost deadline timestamp of this thread, or None."""
+    deadlines = getattr(_local, 'deadlines', None)
+    return deadlines[-1] if deadlines else None
+
+
+class deadline(object):
+    """
+    Context limiting all waits started within it to the given number of
+    seconds. Nested deadlines can only shorten the enclosing one.
+
+    >>with deadline(100):
+    ...     wait_until(is_active, timeout=300)  # gives up after 100 s
+    """
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __enter__(self):
+        at = time.time() + self.seconds
+        outer = current_deadline()
+        if outer is not None:
+            at = min(at, outer)
+        if not hasattr(_local, 'deadlines'):
+            _local.deadlines = []
+        _local.deadlines.append(at)
+        return at
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.deadlines.pop()
+        return False
+
+
+class Waiter(object):
+    """
+    Call a zero argument function until it returns True.
+
+    :param timeout: seconds to keep probing; None means until the
+        enclosing deadline, or forever when there is none.
+    :param interval: the longest sleep between two probes.
+    :param first_interval: the sleep after the first failed probe, it is
+        multiplied by backoff after each following one.
+    :param jitter: relative random deviation applied to every sleep.
+    :param name: label of the wait in logs and STATS, defaults to the
+        function name.
+    """
+
+    def __init__(self, timeout=None, interval=10, first_interval=1,
+                 backoff=2, jitter=0.1, name=None):
+        self.timeout = timeout
+        self.interval = interval
+        self.first_interval = first_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.name = name
+        self.stats = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the wait, possibly from another thread, as a failure."""
+        self._cancelled.set()
+
+    def wait(self, func):
+        """Return True once func() does, False on timeout or cancel."""
+        stats = WaitStats(self.name or getattr(func, '__name__', 'wait'))
+        start = time.time()
+        end = current_deadline()
+        if self.timeout is not None:
+            end = min(end or start + self.timeout, start + self.timeout)
+        delay = min(self.first_interval, self.interval)
+        try:
+            while not self._cancelled.is_set():
+                stats.probes += 1
+                if func():
+                    stats.succeeded = True
+                    break
+                now = time.time()
+                if end is not None and now >= end:
+                    break
+                sleep_for = delay * (1 + random.uniform(-self.jitter,
+                                                        self.jitter))
+                if end is not None:
+                    sleep_for = min(sleep_for, end - now)
+                LOG.debug("Sleeping for %.1f seconds", sleep_for)
+                self._cancelled.wait(sleep_for)
+                delay = min(delay * self.backoff, self.interval)
+        finally:
+            stats.elapsed = time.time() - start
+            stats.cancelled = self._cancelled.is_set()
+            self.stats = stats
+            STATS.append(stats)
+            LOG.debug("Wait finished: %r", stats)
+        return stats.succeeded
+
+
+def wait_until(func, timeout=None, interval=10, **kwargs):
+    """Shortcut for Waiter(timeout, interval, **kwargs).wait(func)."""
+    return Waiter(timeout, interval, **kwargs).wait(func)
+
+
+def summary():
+    """
+    Aggregate recorded waits per name.
+
+    :returns: dict name -> {'waits', 'succeeded', 'probes', 'elapsed'}
+        where probes and elapsed are averages per wait.
+    """
+    result = {}
+    for stats in list(STATS):
+        item = result.setdefault(stats.name, {'waits': 0, 'succeeded': 0,
+                                              'probes': 0, 'elapsed': 0.0})
+        item['waits'] += 1
+        item['succeeded'] += int(stats.succeeded)
+        item['probes'] += stats.probes
+        item['elapsed'] += stats.elapsed
+    for item in result.values():
+        item['probes'] = float(item['probes']) / item['waits']
+        item['elapsed'] = item['elapsed'] / item['waits']
+    return result
+
+
+class StatusFuture(object):
+    """Pending arrival of one watched resource at its expected status."""
+
+    def __init__(self, resource_id, expected_status):
+        self.resource_id = resource_id
+        # None means the resource is expected to disappear
+        self.expected_status = expected_status
+        self.status = None
+        self.done = False
+        self.error = None
+
+    def _resolve(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.done = True
+
+    def result(self):
+        """Return the reached status; raise if the resource failed."""
+        if self.error is not None:
+            raise self.error
+        return self.status
+
+    def __repr__(self):
+        return '<StatusFuture {0} -> {1}: {2}>'.format(
+            self.resource_id, self.expected_status,
+            self.status if self.done else 'pending')
+
+
+class StatusWatcher(object):
+    """
+    Wait for many resources of one kind with a single list call per poll.
+
+    :param list_func: zero argument callable returning the resources,
+        e.g. ``lambda: client.servers.list(search_opts={'name': 'ost1'})``
+        or ``client.volumes.list``; resources need ``id`` and ``status``.
+    :param error_statuses: statuses resolving a future as failed.
+
+    >>watcher = StatusWatcher(client.volumes.list)
+    >>futures = [watcher.watch(v.id, 'available') for v in volumes]
+    >>watcher.wait(timeout=160, interval=10)
+    """
+
+    def __init__(self, list_func, error_statuses=('error',), name=None):
+        self.list_func = list_func
+        self.error_statuses = set(s.lower() for s in error_statuses)
+        self.name = name or 'status_watcher'
+        self.futures = []
+        self.polls = 0
+
+    def watch(self, resource_id, expected_status):
+        future = StatusFuture(resource_id, expected_status)
+        self.futures.append(future)
+        return future
+
+    def watch_deletion(self, resource_id):
+        return self.watch(resource_id, None)
+
+    @property
+    def pending(self):
+        return [future for future in self.futures if not future.done]
+
+    def poll(self):
+        """Refresh all pending futures, return True if none is left."""
+        pending = self.pending
+        if not pending:
+            return True
+        self.polls += 1
+        current = dict((resource.id,
+                        getattr(resource, 'status', 'unknown').lower())
+                       for resource in self.list_func())
+        for future in pending:
+            status = current.get(future.resource_id)
+            if future.expected_status is None:
+                if status is None or status == 'deleted':
+                    future._resolve('deleted')
+            elif status == future.expected_status.lower():
+                future._resolve(status)
+            elif status in self.error_statuses:
+                future._resolve(status, AssertionError(
+                    "{0} failed to get to {1} status. In {2} state.".format(
+                        future.resource_id, future.expected_status,
+                        status)))
+            elif status is None:
+                future._resolve(status, AssertionError(
+                    "{0} disappeared while waiting for {1} status.".format(
+                        future.resource_id, future.expected_status)))
+        LOG.debug("%s: %d of %d resources pending", self.name,
+                  len(self.pending), len(self.futures))
+        return not self.pending
+
+    def wait(self, timeout=None, interval=10, **kwargs):
+        """Poll until every future is resolved, return False on timeout."""
+        return wait_until(self.poll, timeout, interval, name=self.name,
+                          **kwargs)
@@ -148,6 +148,16 @@ class SSHExecCommandFailed(FuelException):
                "Error:\n%(strerror)s")
 
 
+class SSHFanOutFailed(FuelException):
+    """Raised when a command run on several hosts failed on some of them."""
+    message = "Command failed on hosts: %(hosts)s"
+
+
+class AMQPError(FuelException):
+    message = ("RabbitMQ management API request %(method)s %(path)s "
+               "failed with status %(status)s")
+
+
 class ServerUnreachable(FuelException):
     message = "The server is not reachable via the configured network"
 
@@ -18,8 +18,10 @@
 
 import logging
 import os
+import time
 import traceback
 
+from fuel_health.common import inventory
 from fuel_health.common.utils.data_utils import rand_name
 import fuel_health.common.ssh
 import fuel_health.nmanager
@@ -45,6 +47,7 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
                 cls.fail('Heat is unavailable.')
             cls.wait_interval = cls.config.compute.build_interval
             cls.wait_timeout = cls.config.compute.build_timeout
+        cls.image_ids = {}
 
     @classmethod
     def tearDownClass(cls):
@@ -118,7 +121,8 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
 
         if not fuel_health.test.call_until_true(check_status,
                                                 timeout,
-                                                interval):
+                                                interval,
+                                                name='stack_status'):
             self.fail("Timed out waiting to become %s"
                       % expected_status)
 
@@ -126,7 +130,8 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
         f = lambda: self._find_stack(self.heat_client, 'id', stack_id) is None
         if not fuel_health.test.call_until_true(f,
                                                 self.wait_timeout,
-                                                self.wait_interval):
+                                                self.wait_interval,
+                                                name='stack_deleted'):
             self.fail("Timed out waiting for stack to be deleted.")
 
     def _run_ssh_cmd(self, cmd):
@@ -147,32 +152,60 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
             self.fail("%s command failed." % cmd)
 
     def _find_heat_image(self, image_name):
-        return image_name in [i.name for i in
-                              self.compute_client.images.list()]
+        return bool(inventory.cache.find(
+            'images', self.compute_client.images.list, 'name', image_name))
 
     def _find_heat_image_id(self, image_name):
-        image_id = [i.id for i in self.compute_client.images.list()
-                    if i.name == image_name]
-        return image_id
+        """
+        Returns ids of the images with the given name, the images are
+        looked up once per test class.
+        """
+        if not self.image_ids.get(image_name):
+            self.image_ids[image_name] = [
+                i.id for i in inventory.cache.find(
+                    'images', self.compute_client.images.list,
+                    'name', image_name)]
+        return self.image_ids[image_name]
+
+    def _list_heat_instances(self, image_id):
+        return self.compute_client.servers.list(
+            search_opts={'image': image_id})
+
+    def _wait_for_autoscaling(self, exp_count, timeout, interval,
+                              stack_id=None):
+        """
+        Waits for exp_count instances booted from the Heat image.
 
-    def _wait_for_autoscaling(self, exp_count,
-                              timeout, interval):
+        With stack_id given, instances are only counted again once Heat
+        has recorded new events for the stack (or after a minute
+        without them), so most polls cost a single events request.
+        """
         img_id = self._find_heat_image_id('F17-x86_64-cfntools')[0]
+        state = {'events': None, 'counted_at': 0}
+
+        def stack_changed():
+            if stack_id is None:
+                return True
+            try:
+                events = len(self.heat_client.events.list(stack_id))
+            except Exception:
+                LOG.debug(traceback.format_exc())
+                return True
+            changed = events != state['events']
+            state['events'] = events
+            return changed or time.time() - state['counted_at'] > 60
 
         def count_instances():
-            res = []
-            _list = self.compute_client.servers.list()
-            for i in _list:
-                details = self.compute_client.servers.get(server=i)
-                LOG.info('instance details is {0}'.format(details.image))
-                if details.image['id'] == img_id:
-                    res.append(i)
-                    LOG.info('!!! current res is {0}'.format(res))
-
-            return len(res) == exp_count
+            if not stack_changed():
+                return False
+            state['counted_at'] = time.time()
+            count = len(self._list_heat_instances(img_id))
+            LOG.debug('%s instances of %s image, waiting for %s',
+                      count, img_id, exp_count)
+            return count == exp_count
 
         return fuel_health.test.call_until_true(
-            count_instances, timeout, interval)
+            count_instances, timeout, interval, name='autoscaling')
 
     def _wait_for_cloudinit(self, conn_string, timeout, interval):
         """
@@ -186,7 +219,7 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
             return self._run_ssh_cmd(cmd) == "YES"
 
         return fuel_health.test.call_until_true(
-            check, timeout, interval)
+            check, timeout, interval, name='cloudinit')
 
     def _save_key_to_file(self, key):
         return self._run_ssh_cmd(
@@ -204,10 +237,7 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
 
     def _get_net_uuid(self):
         if 'neutron' in self.config.network.network_provider:
-            network = [net.id for net in
-                       self.compute_client.networks.list()
-                       if net.label == self.private_net]
-            return network
+            return self._find_private_net_ids()
 
     def _get_subnet_id(self):
         if 'neutron' in self.config.network.network_provider:
@@ -230,10 +260,7 @@ class HeatBaseTest(fuel_health.nmanager.NovaNetworkScenarioTest,
             if subnet:
                 return subnet
             # if network has no subnets
-            networks = [net.id for net in
-                        self.compute_client.networks.list()
-                        if net.label == self.private_net]
-            return networks[0]
+            return self._find_private_net_ids()[0]
 
     @staticmethod
     def _load_template(file_name):
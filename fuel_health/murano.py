@@ -16,15 +16,22 @@
 import json
 import logging
 import requests
-import time
 import traceback
 
 import muranoclient.common.exceptions as exceptions
+from fuel_health.common import inventory
 from fuel_health.common.utils.data_utils import rand_name
 import fuel_health.nmanager
+import fuel_health.test
 
 LOG = logging.getLogger(__name__)
 
+# shared by all Murano API calls to keep their connections alive,
+# the pool is big enough for the environments deployed at once
+REQ_SES = requests.Session()
+REQ_SES.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=20))
+REQ_SES.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=20))
+
 
 class MuranoTest(fuel_health.nmanager.OfficialClientTest):
     """
@@ -88,7 +95,8 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
 
             image_type should be in [linux, windows.2012, cirros.demo]
         """
-        for image in self.compute_client.images.list():
+        for image in inventory.cache.list('images',
+                                          self.compute_client.images.list):
             tag = 'murano_image_info'
             if tag in image.metadata:
                 metadata = json.loads(image.metadata[tag])
@@ -102,8 +110,8 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
             Returns the list of environments.
         """
 
-        resp = requests.get(self.endpoint + 'environments',
-                            headers=self.headers)
+        resp = REQ_SES.get(self.endpoint + 'environments',
+                           headers=self.headers)
         return resp.json()
 
     def create_environment(self, name):
@@ -117,9 +125,9 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
         """
 
         post_body = {'name': name}
-        resp = requests.post(self.endpoint + 'environments',
-                             data=json.dumps(post_body),
-                             headers=self.headers)
+        resp = REQ_SES.post(self.endpoint + 'environments',
+                            data=json.dumps(post_body),
+                            headers=self.headers)
         return resp.json()
 
     def get_environment(self, environment_id):
@@ -133,9 +141,9 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
             Returns specific environment.
         """
 
-        return requests.get('{0}environments/{1}'.format(self.endpoint,
-                                                         environment_id),
-                            headers=self.headers).json()
+        return REQ_SES.get('{0}environments/{1}'.format(self.endpoint,
+                                                        environment_id),
+                           headers=self.headers).json()
 
     def update_environment(self, environment_id, new_name):
         """
@@ -161,7 +169,7 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
         """
 
         endpoint = '{0}environments/{1}'.format(self.endpoint, environment_id)
-        resp = requests.delete(endpoint, headers=self.headers)
+        resp = REQ_SES.delete(endpoint, headers=self.headers)
         return resp
 
     def create_session(self, environment_id):
@@ -177,8 +185,8 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
         post_body = None
         endpoint = '{0}environments/{1}/configure'.format(self.endpoint,
                                                           environment_id)
-        return requests.post(endpoint, data=post_body,
-                             headers=self.headers).json()
+        return REQ_SES.post(endpoint, data=post_body,
+                            headers=self.headers).json()
 
     def get_session(self, environment_id, session_id):
         """
@@ -219,7 +227,7 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
 
         endpoint = '{0}environments/{1}/sessions/{2}/deploy'.format(
             self.endpoint, environment_id, session_id)
-        return requests.post(endpoint, data=None, headers=self.headers)
+        return REQ_SES.post(endpoint, data=None, headers=self.headers)
 
     def create_service(self, environment_id, session_id, json_data):
         """
@@ -236,8 +244,8 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
         headers.update({'x-configuration-session': session_id})
         endpoint = '{0}environments/{1}/services'.format(self.endpoint,
                                                          environment_id)
-        return requests.post(endpoint, data=json.dumps(json_data),
-                             headers=headers).json()
+        return REQ_SES.post(endpoint, data=json.dumps(json_data),
+                            headers=headers).json()
 
     def list_services(self, environment_id, session_id=None):
         """
@@ -284,22 +292,70 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
                                                   '/{0}'.format(service_id),
                                                   session_id)
 
-    def deploy_check(self, environment_id):
+    def deploy_check(self, environment_id, timeout=None):
         """
             This method allows to wait for deployment of Murano evironments.
 
             Input parameters:
               environment_id - ID of environment
+              timeout - seconds to wait, by default until the deadline
+                        of the enclosing verify() call
+
+            Returns 'OK'.
+        """
+
+        return self.deploy_check_all([environment_id], timeout)
+
+    def deploy_check_all(self, environment_ids, timeout=None):
+        """
+            This method allows to wait for deployment of several Murano
+            environments at once.
+
+            Input parameters:
+              environment_ids - IDs of environments
+              timeout - seconds to wait, by default until the deadline
+                        of the enclosing verify() call
 
             Returns 'OK'.
         """
 
-        infa = self.get_environment(environment_id)
-        while infa['status'] != 'ready':
-            time.sleep(5)
-            infa = self.get_environment(environment_id)
+        pending = set(environment_ids)
+
+        def are_ready():
+            for environment_id in list(pending):
+                status = self.get_environment(environment_id)['status']
+                if status == 'ready':
+                    pending.discard(environment_id)
+                elif status == 'deploy failure':
+                    self.fail("Deployment of environment {0} "
+                              "failed".format(environment_id))
+            return not pending
+
+        if not fuel_health.test.call_until_true(are_ready, timeout, 5,
+                                                name='murano_deploy'):
+            self.fail("Timed out waiting for deployment of environments "
+                      "{0}".format(', '.join(sorted(pending))))
         return 'OK'
 
+    def deploy_environments(self, sessions, timeout=None):
+        """
+            This method allows to deploy several Murano environments
+            concurrently: all the sessions are sent on deployment
+            before waiting for any of them.
+
+            Input parameters:
+              sessions - list of (environment_id, session_id) pairs
+              timeout - seconds to wait, by default until the deadline
+                        of the enclosing verify() call
+
+            Returns 'OK'.
+        """
+
+        for environment_id, session_id in sessions:
+            self.deploy_session(environment_id, session_id)
+        return self.deploy_check_all(
+            [environment_id for environment_id, _ in sessions], timeout)
+
     def deployments_status_check(self, environment_id):
         """
             This method allows to check that deployment status is 'success'.
@@ -312,13 +368,13 @@ class MuranoTest(fuel_health.nmanager.OfficialClientTest):
 
         endpoint = '{0}environments/{1}/deployments'.format(self.endpoint,
                                                             environment_id)
-        deployments = requests.get(endpoint,
-                                   headers=self.headers).json()['deployments']
+        deployments = REQ_SES.get(endpoint,
+                                  headers=self.headers).json()['deployments']
         for depl in deployments:
             # Save the information about all deployments
             LOG.debug("Environment state: {0}".format(depl['state']))
-            r = requests.get('{0}/{1}'.format(endpoint, depl['id']),
-                             headers=self.headers).json()
+            r = REQ_SES.get('{0}/{1}'.format(endpoint, depl['id']),
+                            headers=self.headers).json()
             LOG.debug("Reports: {0}".format(r))
 
             assert depl['state'] == 'success'
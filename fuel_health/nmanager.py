@@ -46,11 +46,15 @@ import cinderclient.client
 import keystoneclient.v2_0.client
 import novaclient.client
 
+from fuel_health.common import inventory
 from fuel_health.common.ssh import Client as SSHClient
+from fuel_health.common.utils import misc
+from fuel_health.common import waiters
 from fuel_health.exceptions import SSHExecCommandFailed
 from fuel_health.common.utils.data_utils import rand_name
 from fuel_health.common.utils.data_utils import rand_int_id
 from fuel_health import exceptions
+import fuel_health.common.ssh
 import fuel_health.manager
 import fuel_health.test
 from fuel_health import config
@@ -71,8 +75,14 @@ class OfficialClientManager(fuel_health.manager.Manager):
         self.traceback = ''
         self.keystone_error_message = None
         self.compute_client = self._get_compute_client()
+        self._watch_inventory(self.compute_client, 'images', 'networks',
+                              'floating_ip_pools')
+        # snapshots of servers are images too
+        inventory.cache.watch(self.compute_client.servers, 'images',
+                              methods=('create_image',))
         try:
             self.identity_client = self._get_identity_client()
+            self._watch_inventory(self.identity_client, 'tenants')
             self.clients_initialized = True
         except Exception as e:
             if e.__class__.__name__ == 'Unauthorized':
@@ -104,6 +114,11 @@ class OfficialClientManager(fuel_health.manager.Manager):
                 'ceilometer_client'
             ]
 
+    @staticmethod
+    def _watch_inventory(client, *resources):
+        for resource in resources:
+            inventory.cache.watch(getattr(client, resource), resource)
+
     def _get_compute_client(self, username=None, password=None,
                             tenant_name=None):
         if not username:
@@ -222,9 +237,9 @@ class OfficialClientManager(fuel_health.manager.Manager):
             username = self.config.identity.admin_username
         if not password:
             password = self.config.identity.admin_password
-        tenant_id = [
-            tenant.id for tenant in self.identity_client.tenants.list()
-            if tenant.name == tenant_name][0]
+        tenant_id = inventory.cache.find(
+            'tenants', self.identity_client.tenants.list,
+            'name', tenant_name)[0].id
         return saharaclient.client.Client(self.config.savanna.api_version,
                                           username=username,
                                           api_key=password,
@@ -264,17 +279,18 @@ class OfficialClientTest(fuel_health.test.TestCase):
 
     def get_image_from_name(self):
         image_name = self.manager.config.compute.image_name
-        images = self.compute_client.images.list()
-        image_id = ''
+        images = inventory.cache.find(
+            'images', self.compute_client.images.list,
+            'name', image_name, inventory.normalize_name)
         LOG.debug(images)
-        if images:
-            for im in images:
-                LOG.debug(im.name)
-                if im.name.strip().lower() == image_name.strip().lower():
-                    image_id = im.id
-        if not image_id:
+        if not images:
             raise exceptions.ImageFault
-        return image_id
+        return images[-1].id
+
+    def _find_private_net_ids(self):
+        return [net.id for net in inventory.cache.find(
+            'networks', self.compute_client.networks.list,
+            'label', self.private_net)]
 
     def _delete_server(self, server):
         LOG.debug("Deleting server.")
@@ -290,7 +306,7 @@ class OfficialClientTest(fuel_health.test.TestCase):
                 return False
 
         fuel_health.test.call_until_true(
-            is_deletion_complete, 20, 10)
+            is_deletion_complete, 20, 10, name='server_deletion')
 
     def retry_command(self, retries, timeout, method, *args, **kwargs):
         for i in range(retries):
@@ -332,42 +348,104 @@ class OfficialClientTest(fuel_health.test.TestCase):
                           image=self.manager.config.compute.image_name))
 
     @classmethod
-    def tearDownClass(cls):
-        cls.error_msg = []
-        while cls.os_resources:
-            thing = cls.os_resources.pop()
+    def _delete_resources(cls, things):
+        """
+        Issue delete() for all things concurrently, then wait for all of
+        them to disappear together.
+        """
+        deleted = []
+
+        def delete(thing):
             LOG.debug("Deleting %r from shared resources of %s" %
                       (thing, cls.__name__))
-
             try:
                 # OpenStack resources are assumed to have a delete()
                 # method which destroys the resource...
                 thing.delete()
             except Exception as e:
                 # If the resource is already missing, mission accomplished.
+                if e.__class__.__name__ != 'NotFound':
+                    cls.error_msg.append(e)
+                    LOG.debug(traceback.format_exc())
+                return
+            # Deletion testing is only required for objects whose
+            # existence cannot be checked via retrieval.
+            if not isinstance(thing, dict):
+                deleted.append(thing)
+
+        misc.run_concurrently(delete, things)
+
+        # Resources coming from the same client manager are checked with
+        # a single list() call, the rest is retrieved one by one.
+        watchers = {}
+        remaining = []
+        for thing in deleted:
+            manager = getattr(thing, 'manager', None)
+            if hasattr(manager, 'list') and hasattr(thing, 'id'):
+                if id(manager) not in watchers:
+                    watchers[id(manager)] = waiters.StatusWatcher(
+                        manager.list, name='teardown_deletion')
+                watchers[id(manager)].watch_deletion(thing.id)
+            else:
+                remaining.append(thing)
+
+        def is_gone(thing):
+            try:
+                thing.get()
+            except Exception as e:
+                # Clients are expected to return an exception
+                # called 'NotFound' if retrieval fails.
                 if e.__class__.__name__ == 'NotFound':
-                    continue
+                    return True
                 cls.error_msg.append(e)
                 LOG.debug(traceback.format_exc())
+            return False
 
-            def is_deletion_complete():
-                # Deletion testing is only required for objects whose
-                # existence cannot be checked via retrieval.
-                if isinstance(thing, dict):
-                    return True
+        def is_deletion_complete():
+            for key, watcher in watchers.items():
                 try:
-                    thing.get()
+                    if watcher.poll():
+                        del watchers[key]
                 except Exception as e:
-                    # Clients are expected to return an exception
-                    # called 'NotFound' if retrieval fails.
-                    if e.__class__.__name__ == 'NotFound':
-                        return True
                     cls.error_msg.append(e)
                     LOG.debug(traceback.format_exc())
-                return False
+                    del watchers[key]
+            remaining[:] = [thing for thing in remaining
+                            if not is_gone(thing)]
+            return not (watchers or remaining)
+
+        # Block until resource deletion has completed or timed-out
+        fuel_health.test.call_until_true(is_deletion_complete, 20, 10,
+                                         name='resource_deletion')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.error_msg = []
+        start = time.time()
+        things = []
+        seen = set()
+        # Resources are released in reverse order of creation; a resource
+        # registered several times (e.g. a server re-fetched once active)
+        # is deleted once.
+        while cls.os_resources:
+            thing = cls.os_resources.pop()
+            key = (thing.__class__.__name__, getattr(thing, 'id', id(thing)))
+            if key not in seen:
+                seen.add(key)
+                things.append(thing)
+
+        # Servers go first: volumes are detached and security groups and
+        # keypairs released only once the servers using them are deleted.
+        servers = [thing for thing in things
+                   if thing.__class__.__name__ == 'Server']
+        others = [thing for thing in things
+                  if thing.__class__.__name__ != 'Server']
+        for phase in (servers, others):
+            if phase:
+                cls._delete_resources(phase)
 
-            # Block until resource deletion has completed or timed-out
-            fuel_health.test.call_until_true(is_deletion_complete, 20, 10)
+        LOG.info("Teardown of %s shared resources took %.1f seconds" %
+                 (cls.__name__, time.time() - start))
 
 
 class NovaNetworkScenarioTest(OfficialClientTest):
@@ -480,9 +558,7 @@ class NovaNetworkScenarioTest(OfficialClientTest):
     def _create_server(self, client, name, security_groups):
         base_image_id = self.get_image_from_name()
         if 'neutron' in self.config.network.network_provider:
-            network = [net.id for net in
-                       self.compute_client.networks.list()
-                       if net.label == self.private_net]
+            network = self._find_private_net_ids()
 
             if network:
                 create_kwargs = {'nics': [{'net-id': network[0]}],
@@ -509,7 +585,8 @@ class NovaNetworkScenarioTest(OfficialClientTest):
         return server
 
     def _create_floating_ip(self):
-        floating_ips_pool = self.compute_client.floating_ip_pools.list()
+        floating_ips_pool = inventory.cache.list(
+            'floating_ip_pools', self.compute_client.floating_ip_pools.list)
 
         if floating_ips_pool:
             floating_ip = self.compute_client.floating_ips.create(
@@ -613,6 +690,8 @@ class NovaNetworkScenarioTest(OfficialClientTest):
 
     @classmethod
     def tearDownClass(cls):
+        # Tunnels to the instances are useless once they are deleted.
+        fuel_health.common.ssh.vm_connection_pool.close_all()
         super(NovaNetworkScenarioTest, cls).tearDownClass()
         if cls.manager.clients_initialized:
             cls._clean_floating_ips()
@@ -775,9 +854,7 @@ class SmokeChecksTest(OfficialClientTest):
         name = rand_name('ost1_test-volume-instance')
         base_image_id = self.get_image_from_name()
         if 'neutron' in self.config.network.network_provider:
-            network = [net.id for net in
-                       self.compute_client.networks.list()
-                       if net.label == self.private_net]
+            network = self._find_private_net_ids()
             if network:
                 create_kwargs = {'nics': [{'net-id': network[0]}]}
             else:
@@ -831,7 +908,8 @@ class SmokeChecksTest(OfficialClientTest):
                     return True
                 return False
 
-        fuel_health.test.call_until_true(is_volume_deleted, 20, 10)
+        fuel_health.test.call_until_true(is_volume_deleted, 20, 10,
+                                         name='volume_deletion')
 
     @classmethod
     def tearDownClass(cls):
@@ -19,9 +19,12 @@ import logging
 import time
 import traceback
 
-from fuel_health.common.savanna_ssh import ssh_command
+from fuel_health.common import inventory
+from fuel_health.common.savanna_ssh import probe_ports
+from fuel_health.common.savanna_ssh import ssh_commands
 from fuel_health.common.utils.data_utils import rand_name
 import fuel_health.nmanager as nmanager
+import fuel_health.test
 
 
 LOG = logging.getLogger(__name__)
@@ -80,14 +83,15 @@ class SavannaTest(nmanager.OfficialClientTest):
         tag_plugin = '_sahara_tag_%s' % self.plugin
         LOG.debug('Testing image - plugin - %s version - %s',
                   tag_plugin, tag_version)
-        for image in self.compute_client.images.list():
-            if image.name == 'savanna':
-                LOG.debug('Sahara image metadata is %s', image.metadata)
-                if image.metadata[tag_version] == 'True'\
-                    and image.metadata[tag_plugin] == 'True'\
-                        and image.metadata['_sahara_username'] is not None:
-                            LOG.debug('Correct image for savanna found')
-                            return True
+        for image in inventory.cache.find(
+                'images', self.compute_client.images.list,
+                'name', 'savanna'):
+            LOG.debug('Sahara image metadata is %s', image.metadata)
+            if image.metadata[tag_version] == 'True'\
+                and image.metadata[tag_plugin] == 'True'\
+                    and image.metadata['_sahara_username'] is not None:
+                        LOG.debug('Correct image for savanna found')
+                        return True
         LOG.debug('Correct image for Sahara not found')
         return False
 
@@ -163,28 +167,27 @@ class SavannaTest(nmanager.OfficialClientTest):
             return body
 
     def _check_cluster_state(self, cluster_id):
+        start = time.time()
 
-        data = self.savanna_client.clusters.get(cluster_id)
-        i = 1
-
-        while str(data.status) != 'Active':
-            LOG.debug('CLUSTER STATUS:' + str(i * 10) +
+        def is_active():
+            data = self.savanna_client.clusters.get(cluster_id)
+            elapsed = int(time.time() - start)
+            LOG.debug('CLUSTER STATUS:' + str(elapsed) +
                       ' sec:' + str(data.status))
-            print('CLUSTER STATUS:' + str(i * 10) + ' sec:' + str(data.status))
+            print('CLUSTER STATUS:' + str(elapsed) + ' sec:' +
+                  str(data.status))
 
             if str(data.status) == 'Error':
-                LOG.debug('\n' + str(i * 10) + ' sec:' + str(data) + '\n')
+                LOG.debug('\n' + str(elapsed) + ' sec:' + str(data) + '\n')
                 self.fail("Cluster state == 'Error'")
+            return str(data.status) == 'Active'
 
-            if i > self.CLUSTER_CREATION_TIMEOUT * 6:
-                LOG.debug('\n' + str(i * 10) + ' sec:' + str(data) + '\n')
-                self.fail(
-                    'Cluster state != \'Active\', passed {timeout} '
-                    'minutes'.format(timeout=self.CLUSTER_CREATION_TIMEOUT))
-
-            data = self.savanna_client.clusters.get(cluster_id)
-            time.sleep(10)
-            i += 1
+        if not fuel_health.test.call_until_true(
+                is_active, int(self.CLUSTER_CREATION_TIMEOUT) * 60, 10,
+                name='sahara_cluster_state'):
+            self.fail(
+                'Cluster state != \'Active\', passed {timeout} '
+                'minutes'.format(timeout=self.CLUSTER_CREATION_TIMEOUT))
 
     @classmethod
     def _get_cluster_node_ip_list_with_node_processes(
@@ -229,23 +232,33 @@ class SavannaTest(nmanager.OfficialClientTest):
             'node_info': node_info
         }
 
-    def _try_port(self, host, port):
-        i = 0
-        while True:
-            cmd = ("timeout 60 bash -c 'echo >/dev/"
-                   "tcp/{0}/{1}'; echo $?".format(host, port))
-            output, output_err = ssh_command(cmd)
-            print('NC output after %s seconds is "%s"' % (i * 10, output))
-            LOG.debug('NC output after %s seconds is "%s"',
-                      i * 10, output)
-            if output or str(output_err).find(' succeeded!') > 0:
-                break
-            if not output and i > 600:
-                self.fail('On host %s port %s is not opened '
-                          'more then 10 minutes' % (host, port))
-            time.sleep(10)
-            i += 1
-        return True
+    def _wait_for_ports(self, endpoints, timeout=600, interval=10):
+        """
+        Wait until all the (host, port) endpoints are open, probing the
+        pending ones together on every attempt.
+
+        :returns: dict endpoint -> seconds it took the port to open.
+        """
+        start = time.time()
+        pending = set(endpoints)
+        ready = {}
+
+        def all_open():
+            opened = probe_ports(pending)
+            for host, port in opened:
+                ready[(host, port)] = time.time() - start
+                LOG.debug('Port %s on host %s is opened after %.0f seconds',
+                          port, host, ready[(host, port)])
+            pending.difference_update(opened)
+            return not pending
+
+        if not fuel_health.test.call_until_true(
+                all_open, timeout, interval, name='sahara_ports'):
+            self.fail('Ports are not opened more then {0} minutes: '
+                      '{1}'.format(timeout / 60, ', '.join(
+                          '{0}:{1}'.format(host, port)
+                          for host, port in sorted(pending))))
+        return ready
 
     def _check_auto_assign_floating_ip(self):
         cmd_nova = ('grep auto_assign_floating_ip '
@@ -253,23 +266,22 @@ class SavannaTest(nmanager.OfficialClientTest):
         cmd_neutron = ('grep -E '
                        '"network_api_class=nova.network.neutronv2.api.API" '
                        '/etc/nova/nova.conf')
-        output_nova, output_nova_err = ssh_command(cmd_nova)
-        output_neutron, output_neutron_err = ssh_command(cmd_neutron)
-        if(output_neutron or str(output_neutron_err).find(
-                'network_api_class=nova.network.neutronv2.api.API') > 0):
+        output_nova, output_neutron = ssh_commands([cmd_nova, cmd_neutron])
+        if output_neutron:
             LOG.debug('neutron is found')
             network = self.compute_client.networks.find(
                 label=self.neutron_floating_ip)
             return ('neutron', network.id)
-        elif output_nova or str(output_nova_err).find(' True') > 0:
+        elif output_nova:
             LOG.debug('auto_assign_floating_ip is found')
             return ('nova_auto', None)
         else:
             LOG.debug('auto_assign_floating_ip is not found')
-            LOG.debug('floating pool is %s',
-                      self.compute_client.floating_ip_pools.list()[0].name)
-            return ('nova',
-                    self.compute_client.floating_ip_pools.list()[0].name)
+            pool = inventory.cache.list(
+                'floating_ip_pools',
+                self.compute_client.floating_ip_pools.list)[0].name
+            LOG.debug('floating pool is %s', pool)
+            return ('nova', pool)
 
     def _get_node_info(self, node_ip_list_with_node_processes, plugin_name):
         tasktracker_count = 0
@@ -296,12 +308,15 @@ class SavannaTest(nmanager.OfficialClientTest):
             self.tt = 'TASKTRACKER'
             self.dn = 'DATANODE'
             self.nn = 'NAMENODE'
+        endpoints = []
+        for node_ip, processes in node_ip_list_with_node_processes.items():
+            endpoints.append((node_ip, 22))
+            endpoints.extend((node_ip, portmap[process])
+                             for process in processes if process in portmap)
+        ports_ready = self._wait_for_ports(endpoints)
+
         for node_ip, processes in node_ip_list_with_node_processes.items():
-            self._try_port(node_ip, '22')
             node_count += 1
-            for process in processes:
-                if process in portmap:
-                    self._try_port(node_ip, portmap[process])
             if self.tt in processes:
                 tasktracker_count += 1
             if self.dn in processes:
@@ -313,7 +328,8 @@ class SavannaTest(nmanager.OfficialClientTest):
             'namenode_ip': namenode_ip,
             'tasktracker_count': tasktracker_count,
             'datanode_count': datanode_count,
-            'node_count': node_count
+            'node_count': node_count,
+            'ports_ready': ports_ready
         }
 
     def create_sahara_cluster(self, cluster_template_id):
@@ -500,32 +516,31 @@ class SavannaTest(nmanager.OfficialClientTest):
         elif plugin_name == 'hdp':
             hadoop_user = self.HDP_HADOOP_USER
             node_username = self.HDP_NODE_USERNAME
-        ssh_command('echo "%s" > /tmp/ostf-savanna.pem' %
-                    self.keys[0].private_key)
-        ssh_command('chmod 600  /tmp/ostf-savanna.pem')
+        ssh_commands(['echo "%s" > /tmp/ostf-savanna.pem' %
+                      self.keys[0].private_key,
+                      'chmod 600  /tmp/ostf-savanna.pem'])
         while True:
-            cmd = ('ssh -i /tmp/ostf-savanna.pem -l %s '
-                   '-oUserKnownHostsFile=/dev/null '
-                   '-oStrictHostKeyChecking=no %s '
-                   'sudo -u %s -i "hadoop job '
-                   '-list-active-trackers | wc -l"' %
-                   (self.V_NODE_USERNAME, node_info['namenode_ip'],
-                    hadoop_user))
-            stdout, stderr = ssh_command(cmd)
-            active_tasktracker_count = int(stdout)
+            cmd_tt = ('ssh -i /tmp/ostf-savanna.pem -l %s '
+                      '-oUserKnownHostsFile=/dev/null '
+                      '-oStrictHostKeyChecking=no %s '
+                      'sudo -u %s -i "hadoop job '
+                      '-list-active-trackers | wc -l"' %
+                      (self.V_NODE_USERNAME, node_info['namenode_ip'],
+                       hadoop_user))
+            cmd_dn = ('ssh -i /tmp/ostf-savanna.pem -l %s '
+                      '-oUserKnownHostsFile=/dev/null '
+                      '-oStrictHostKeyChecking=no %s '
+                      'sudo -u %s -i "hadoop dfsadmin -report" '
+                      '| grep "Datanodes available:.*" | awk '
+                      '\'{print $3}\'' %
+                      (self.V_NODE_USERNAME, node_info['namenode_ip'],
+                       hadoop_user))
+            stdout_tt, stdout_dn = ssh_commands([cmd_tt, cmd_dn])
+            active_tasktracker_count = int(stdout_tt)
             LOG.debug('active_tasktracker_count:%s',
                       active_tasktracker_count)
             print('active_tasktracker_count:%s' % active_tasktracker_count)
-            cmd = ('ssh -i /tmp/ostf-savanna.pem -l %s '
-                   '-oUserKnownHostsFile=/dev/null '
-                   '-oStrictHostKeyChecking=no %s '
-                   'sudo -u %s -i "hadoop dfsadmin -report" '
-                   '| grep "Datanodes available:.*" | awk '
-                   '\'{print $3}\'' %
-                   (self.V_NODE_USERNAME, node_info['namenode_ip'],
-                    hadoop_user))
-            stdout, stderr = ssh_command(cmd)
-            active_datanode_count = int(stdout)
+            active_datanode_count = int(stdout_dn)
             LOG.debug('active_datanode_count:%s', active_datanode_count)
             print('active_datanode_count:%s' % active_datanode_count)
 
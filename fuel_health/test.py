@@ -16,13 +16,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import time
-
 import testresources
 import unittest2
 
 from fuel_health import config
 from fuel_health.common import log as logging
+from fuel_health.common import waiters
 from fuel_health.common.test_mixins import FuelTestAssertMixin
 
 
@@ -43,7 +42,7 @@ class BaseTestCase(unittest2.TestCase,
         cls.config = config.FuelConfig()
 
 
-def call_until_true(func, duration, sleep_for):
+def call_until_true(func, duration, sleep_for, name=None):
     """
     Call the given function until it returns True (and return True) or
     until the specified duration (in seconds) elapses (and return
@@ -52,18 +51,12 @@ def call_until_true(func, duration, sleep_for):
     :param func: A zero argument callable that returns True on success.
     :param duration: The number of seconds for which to attempt a
         successful call of the function.
-    :param sleep_for: The number of seconds to sleep after an unsuccessful
-                      invocation of the function.
+    :param sleep_for: The longest number of seconds to sleep after an
+                      unsuccessful invocation of the function, see
+                      fuel_health.common.waiters.Waiter.
+    :param name: label of the wait in the waiter statistics.
     """
-    now = time.time()
-    timeout = now + duration
-    while now < timeout:
-        if func():
-            return True
-        LOG.debug("Sleeping for %d seconds", sleep_for)
-        time.sleep(sleep_for)
-        now = time.time()
-    return False
+    return waiters.wait_until(func, duration, sleep_for, name=name)
 
 
 class TestCase(BaseTestCase):
@@ -122,9 +115,9 @@ class TestCase(BaseTestCase):
             LOG.debug("Waiting for %s to get to %s status. "
                       "Currently in %s status",
                       thing, expected_status, new_status)
-        conf = config.FuelConfig()
         if not call_until_true(check_status,
-                               conf.compute.build_timeout,
-                               conf.compute.build_interval):
+                               self.config.compute.build_timeout,
+                               self.config.compute.build_interval,
+                               name='status_timeout'):
             self.fail("Timed out waiting to become %s"
                       % expected_status)
@@ -17,6 +17,7 @@
 import logging
 import traceback
 
+from fuel_health.common import ssh
 from fuel_health.common.ssh import Client as SSHClient
 from fuel_health.common.utils import data_utils
 import fuel_health.test
@@ -43,6 +44,13 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
         if len(self.controllers) == 1:
             self.fail('There is only one controller online. Nothing to check')
 
+    def _exec_on_controllers(self, cmd, controllers=None, timeout=300):
+        """Run cmd on the controllers in parallel, return host->output."""
+        return ssh.exec_on_hosts(
+            controllers or self.controllers, cmd, self.controller_user,
+            key_filename=self.controller_key, timeout=timeout,
+            raise_on_error=True).outputs
+
     @classmethod
     def tearDownClass(cls):
         if cls.master_ip:
@@ -73,13 +81,11 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
         master_node_ip = []
         cmd = 'mysql -e "SHOW SLAVE STATUS\G"'
         LOG.info("Controllers nodes are %s" % self.controllers)
+        outputs = self.verify(
+            20, self._exec_on_controllers, 1, 'Mysql node detection failed',
+            'detect mysql node', cmd, timeout=100)
         for controller_ip in self.controllers:
-            ssh_client = SSHClient(
-                controller_ip, self.controller_user,
-                key_filename=self.controller_key, timeout=100)
-            output = self.verify(
-                20, ssh_client.exec_command, 1, 'Mysql node detection failed',
-                'detect mysql node', cmd)
+            output = outputs[controller_ip]
             LOG.info('output is %s' % output)
             if not output:
                 self.master_ip.append(controller_ip)
@@ -126,18 +132,16 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
         LOG.info('create data')
 
         # Verify that data is replicated on other controllers
-        for controller in self.controllers:
-            if controller not in master_node_ip:
-                client = SSHClient(controller,
-                                   self.controller_user,
-                                   key_filename=self.controller_key)
-
-                output = self.verify(
-                    20, client.exec_command, 5,
-                    'Can not get data from controller %s' % controller,
-                    'get_record', get_record)
-
-                self.verify_response_body(output, record_data,
+        slaves = [controller for controller in self.controllers
+                  if controller not in master_node_ip]
+        if slaves:
+            outputs = self.verify(
+                20, self._exec_on_controllers, 5,
+                'Can not get data from controllers %s' % slaves,
+                'get_record', get_record, slaves)
+
+            for controller in slaves:
+                self.verify_response_body(outputs[controller], record_data,
                                           msg='Expected data missing',
                                           failed_step='6')
 
@@ -165,19 +169,16 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
         for database in dbs:
             LOG.info('Current database name is %s' % database)
             temp_set = set()
+            cmd1 = cmd % {'database': database}
+            LOG.info('Try to execute command %s' % cmd1)
+            outputs = self.verify(40, self._exec_on_controllers, 1,
+                                  'Can list tables',
+                                  'get amount of tables for each database',
+                                  cmd1, self.config.compute.online_controllers,
+                                  self.config.compute.ssh_timeout)
             for node in self.config.compute.online_controllers:
                 LOG.info('Current controller node is %s' % node)
-                cmd1 = cmd % {'database': database}
-                LOG.info('Try to execute command %s' % cmd1)
-                tables = SSHClient(
-                    node, self.controller_user,
-                    key_filename=self.controller_key,
-                    timeout=self.config.compute.ssh_timeout)
-                output = self.verify(40, tables.exec_command, 1,
-                                     'Can list tables',
-                                     'get amount of tables for each database',
-                                     cmd1)
-                tables = set(output.splitlines())
+                tables = set(outputs[node].splitlines())
                 if len(temp_set) == 0:
                     temp_set = tables
                 self.verify_response_true(
@@ -208,13 +209,11 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
             master_node_ip = []
             cmd = 'mysql -e "SHOW SLAVE STATUS\G"'
             LOG.info("Controllers nodes are %s" % self.controllers)
+            outputs = self.verify(20, self._exec_on_controllers, 1,
+                                  'Can not define master node',
+                                  'master mode detection', cmd, timeout=100)
             for controller_ip in self.controllers:
-                ssh_client = SSHClient(controller_ip, self.controller_user,
-                                       key_filename=self.controller_key,
-                                       timeout=100)
-                output = self.verify(20, ssh_client.exec_command, 1,
-                                     'Can not define master node',
-                                     'master mode detection', cmd)
+                output = outputs[controller_ip]
                 LOG.info('output is %s' % output)
                 if not output:
                     self.master_ip.append(controller_ip)
@@ -240,34 +239,36 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
             # ssh on slave node and check it status
             check_slave_state_cmd = 'mysql -e "SHOW SLAVE STATUS\G"'
 
-            for controller in self.controllers:
-                if controller not in self.master_ip:
-                    client = SSHClient(controller,
-                                       self.controller_user,
-                                       key_filename=self.controller_key)
-                    output = self.verify(
-                        20, client.exec_command, 4,
-                        'Failed to get slave status', 'get slave status',
-                        check_slave_state_cmd).splitlines()[1:19]
-
-                    LOG.info("slave output is %s" % output)
-                    res = [data.strip().split(':') for data in output]
-                    slave_dict = dict((k, v) for (k, v) in res)
-                    self.verify_response_body(
-                        slave_dict['Slave_IO_State'],
-                        ' Waiting for master to send event',
-                        msg='Slave IO state is incorrect ',
-                        failed_step='5')
-
-                    self.verify_response_body(
-                        slave_dict['Slave_IO_Running'],
-                        ' Yes',  msg='Slave_IO_Running state is incorrect',
-                        failed_step='6')
-
-                    self.verify_response_body(
-                        slave_dict['Slave_SQL_Running'],
-                        ' Yes',  msg='Slave_SQL_Running state is incorrect',
-                        failed_step='7')
+            slaves = [controller for controller in self.controllers
+                      if controller not in self.master_ip]
+            outputs = {}
+            if slaves:
+                outputs = self.verify(
+                    20, self._exec_on_controllers, 4,
+                    'Failed to get slave status', 'get slave status',
+                    check_slave_state_cmd, slaves)
+
+            for controller in slaves:
+                output = outputs[controller].splitlines()[1:19]
+
+                LOG.info("slave output is %s" % output)
+                res = [data.strip().split(':') for data in output]
+                slave_dict = dict((k, v) for (k, v) in res)
+                self.verify_response_body(
+                    slave_dict['Slave_IO_State'],
+                    ' Waiting for master to send event',
+                    msg='Slave IO state is incorrect ',
+                    failed_step='5')
+
+                self.verify_response_body(
+                    slave_dict['Slave_IO_Running'],
+                    ' Yes',  msg='Slave_IO_Running state is incorrect',
+                    failed_step='6')
+
+                self.verify_response_body(
+                    slave_dict['Slave_SQL_Running'],
+                    ' Yes',  msg='Slave_SQL_Running state is incorrect',
+                    failed_step='7')
         else:
             self.fail("There is no RHEL deployment")
 
@@ -284,16 +285,13 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
         Deployment tags: CENTOS
         """
         if 'CentOS' in self.config.compute.deployment_os:
+            command = "mysql -e \"SHOW STATUS LIKE 'wsrep_%'\""
+            outputs = self.verify(
+                20, self._exec_on_controllers, 1,
+                "Verification of galera cluster node status failed",
+                'get status from galera node', command, timeout=100)
             for controller in self.controllers:
-                    command = "mysql -e \"SHOW STATUS LIKE 'wsrep_%'\""
-                    ssh_client = SSHClient(controller, self.controller_user,
-                                           key_filename=self.controller_key,
-                                           timeout=100)
-                    output = self.verify(
-                        20, ssh_client.exec_command, 1,
-                        "Verification of galera cluster node status failed",
-                        'get status from galera node',
-                        command).splitlines()[3:-2]
+                    output = outputs[controller].splitlines()[3:-2]
 
                     LOG.debug('output is %s' % output)
 
@@ -336,16 +334,13 @@ class TestMysqlReplication(fuel_health.test.BaseTestCase):
         Deployment tags: Ubuntu
         """
         if 'Ubuntu' in self.config.compute.deployment_os:
+            command = "mysql -e \"SHOW STATUS LIKE 'wsrep_%'\""
+            outputs = self.verify(
+                20, self._exec_on_controllers, 1,
+                "Verification of galera cluster node status failed",
+                'get status from galera node', command, timeout=100)
             for controller in self.controllers:
-                    command = "mysql -e \"SHOW STATUS LIKE 'wsrep_%'\""
-                    ssh_client = SSHClient(controller, self.controller_user,
-                                           key_filename=self.controller_key,
-                                           timeout=100)
-                    output = self.verify(
-                        20, ssh_client.exec_command, 1,
-                        "Verification of galera cluster node status failed",
-                        'get status from galera node',
-                        command).splitlines()[3:-2]
+                    output = outputs[controller].splitlines()[3:-2]
 
                     LOG.debug('output is %s' % output)
 
@@ -17,6 +17,7 @@ import logging
 
 import fuel_health
 import fuel_health.common.amqp_client
+from fuel_health.common import ssh
 import fuel_health.common.utils.data_utils
 from fuel_health.test import BaseTestCase
 
@@ -46,6 +47,14 @@ class RabbitSmokeTest(BaseTestCase):
             rabbit_username='nova',
             rabbit_password=cls.amqp_pwd) for cnt in cls._controllers]
 
+    @classmethod
+    def tearDownClass(cls):
+        for client in cls.amqp_clients:
+            client.close()
+            if client.latencies:
+                LOG.debug('RabbitMQ API latencies on %s: %s', client.host,
+                          client.latency_summary())
+
     def setUp(self):
         super(RabbitSmokeTest, self).setUp()
         if 'ha' not in self.config.mode:
@@ -55,6 +64,25 @@ class RabbitSmokeTest(BaseTestCase):
         if not self.amqp_clients:
             self.fail('Cannot create AMQP clients for controllers')
 
+    def _check_cluster_nodes(self):
+        result = self.verify(10, ssh.exec_on_hosts, 1,
+                             'Cannot retrieve cluster nodes list for '
+                             'controllers.', 'cluster status retrieval',
+                             self._controllers, 'rabbitmqctl cluster_status',
+                             self._usr, self._pwd, self._key,
+                             self._ssh_timeout)
+        if result.failed:
+            self.fail('Step 1 failed: Cannot retrieve cluster nodes list '
+                      'for {ctlrs} controllers.'.format(
+                          ctlrs=', '.join(sorted(result.errors))))
+
+        for controller, output in result.outputs.items():
+            count = fuel_health.common.amqp_client.count_running_nodes(output)
+            if len(self._controllers) != count:
+                self.fail('Step 2 failed: Number of controllers is not equal '
+                          'to number of cluster nodes on {ctlr}.'.format(
+                              ctlr=controller))
+
     def test_001_rabbitmqctl_status(self):
         """Check RabbitMQ is available
 
@@ -64,14 +92,7 @@ class RabbitSmokeTest(BaseTestCase):
         Duration: 100 s.
         Deployment tags: CENTOS
         """
-        first_list = self.verify(10, self.amqp_clients[0].list_nodes, 1,
-                                 'Cannot retrieve cluster nodes'
-                                 ' list for {ctlr} controller.'.format(
-                                     ctlr=self.amqp_clients[0].host))
-
-        if len(self._controllers) != self.amqp_clients[0].list_nodes():
-            self.fail('Step 2 failed: Number of controllers is not equal to '
-                      'number of cluster nodes.')
+        self._check_cluster_nodes()
 
     def test_002_rabbitmqctl_status_ubuntu(self):
         """RabbitMQ availability
@@ -81,11 +102,4 @@ class RabbitSmokeTest(BaseTestCase):
         Duration: 100 s.
         Deployment tags: Ubuntu
         """
-        first_list = self.verify(10, self.amqp_clients[0].list_nodes, 1,
-                                 'Cannot retrieve cluster nodes'
-                                 ' list for {ctlr} controller.'.format(
-                                     ctlr=self.amqp_clients[0].host))
-
-        if len(self._controllers) != self.amqp_clients[0].list_nodes():
-            self.fail('Step 2 failed: Number of controllers is not equal to '
-                      'number of cluster nodes.')
+        self._check_cluster_nodes()
@@ -282,16 +282,11 @@ class HeatSmokeTests(heatmanager.HeatBaseTest):
                     stack.id, 'CREATE_COMPLETE', 600, 15)
 
         # find just created instance
-        instance_list = self.compute_client.servers.list()
-        LOG.info('servers list is {0}'.format(instance_list))
         img_id = self._find_heat_image_id('F17-x86_64-cfntools')[0]
         LOG.info('expected img_id is {0}'.format(img_id))
-
-        for i in instance_list:
-            details = self.compute_client.servers.get(server=i)
-            LOG.info('instance details is {0}'.format(details.image))
-            if details.image['id'] == img_id:
-                self.instance.append(i)
+        instance_list = self._list_heat_instances(img_id)
+        LOG.info('servers list is {0}'.format(instance_list))
+        self.instance.extend(instance_list)
 
         if not self.instance:
             self.fail("Failed step: 7 Instance for the {0} stack "
@@ -324,7 +319,7 @@ class HeatSmokeTests(heatmanager.HeatBaseTest):
                     "Stack failed to launch the 2nd instance "
                     "per autoscaling alarm.",
                     "launching the new instance per autoscaling alarm",
-                    len(instance_list) + 1, 180, 10)
+                    len(instance_list) + 1, 180, 10, stack.id)
 
         self.verify(180, self._release_vm_cpu, 13,
                     "Cannot kill the process on VM to turn CPU load off.",
@@ -335,7 +330,7 @@ class HeatSmokeTests(heatmanager.HeatBaseTest):
                     "Stack failed to terminate the 2nd instance "
                     "per autoscaling alarm.",
                     "terminating the 2nd instance per autoscaling alarm",
-                    len(instance_list), 300, 10)
+                    len(instance_list), 300, 10, stack.id)
 
         # delete private key file
         self.verify(10, self._delete_key_file, 15,
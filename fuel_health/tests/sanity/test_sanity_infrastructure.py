@@ -64,10 +64,14 @@ class SanityInfrastructureTest(nmanager.SanityChecksTest):
                                self.usr, self.pwd,
                                key_filename=self.key,
                                timeout=self.timeout)
-        output = self.verify(50, ssh_client.exec_command,
+        # Reading stops at the first failed service, the rest of the
+        # list is not needed to fail the check.
+        output = self.verify(50, ''.join,
                              1, "'nova-manage' command execution failed. ",
                              "nova-manage command execution",
-                             cmd)
+                             ssh_client.exec_command_stream(
+                                 cmd, lines=True,
+                                 stop_when=lambda line: u'XXX' in line))
         LOG.debug(output)
         try:
             self.verify_response_true(
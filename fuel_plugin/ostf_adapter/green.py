@@ -0,0 +1,55 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Cooperative I/O for ostf-server.
+
+The server handles every request in its own greenlet, but a blocking
+socket or psycopg2 call stops all of them. patch() makes sockets (so
+requests talking to Nailgun) and psycopg2 wait in the gevent hub
+instead. It has to be called before the application is set up.
+
+Threads are not patched, gevent sockets cannot be used from real
+threads, which tests use a lot; test run processes are executed
+unpatched therefore.
+'''
+
+from gevent import monkey
+from gevent import socket
+from psycopg2 import extensions
+import psycopg2
+
+
+def _wait_callback(conn, timeout=None):
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            socket.wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            socket.wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(
+                'Bad result from poll: {0!r}'.format(state))
+
+
+def patch():
+    monkey.patch_socket()
+    monkey.patch_ssl()
+    extensions.set_wait_callback(_wait_callback)
+
+
+def is_patched():
+    return extensions.get_wait_callback() is _wait_callback
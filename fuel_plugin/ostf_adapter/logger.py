@@ -17,10 +17,12 @@ import logging
 import logging.handlers
 
 
+LOG_FORMAT = '%(asctime)s %(levelname)s (%(module)s) %(message)s'
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
 def setup(log_file=None):
-    formatter = logging.Formatter(
-        '%(asctime)s %(levelname)s (%(module)s) %(message)s',
-        "%Y-%m-%d %H:%M:%S")
+    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
     log = logging.getLogger(None)
     stream_handler = logging.StreamHandler()
     stream_handler.setLevel(logging.INFO)
@@ -37,3 +39,13 @@ def setup(log_file=None):
         log.addHandler(file_handler)
 
     log.setLevel(logging.INFO)
+
+
+def setup_slow_requests(log_file):
+    '''Writes slow requests logged by SQLProfilingHook into log_file.'''
+    log = logging.getLogger('fuel_plugin.ostf_adapter.slow_requests')
+    file_handler = logging.handlers.WatchedFileHandler(
+        os.path.abspath(log_file))
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    log.addHandler(file_handler)
+    log.propagate = False
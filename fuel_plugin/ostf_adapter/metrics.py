@@ -0,0 +1,279 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Metrics of the adapter and test runs in Prometheus text format.
+
+Every process, server workers as well as test run processes forked by
+them, counts into its own registry and flushes it as json file into
+DIRECTORY, the channel by which they push their counters to the server.
+collect() sums the files of all processes for the /metrics endpoint;
+files of exited processes are merged into one, so their counts live
+as long as the server.
+'''
+
+from contextlib import contextmanager
+import errno
+import fcntl
+import functools
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LOG = logging.getLogger(__name__)
+
+COUNTER, GAUGE, SUMMARY = 'counter', 'gauge', 'summary'
+
+METRICS = {
+    'ostf_http_requests_total': (
+        COUNTER, 'HTTP requests served by the adapter'),
+    'ostf_http_request_duration_seconds': (
+        SUMMARY, 'Time of serving HTTP requests'),
+    'ostf_response_encode_duration_seconds': (
+        SUMMARY, 'Time of encoding of responses'),
+    'ostf_response_size_bytes': (
+        SUMMARY, 'Size of encoded responses'),
+    'ostf_response_sent_bytes': (
+        SUMMARY, 'Size of responses sent, after compression'),
+    'ostf_db_queries_total': (
+        COUNTER, 'SQL statements executed'),
+    'ostf_nailgun_fetch_duration_seconds': (
+        SUMMARY, 'Time of fetching cluster data from Nailgun'),
+    'ostf_discovery_duration_seconds': (
+        SUMMARY, 'Time of discovery of test repository'),
+    'ostf_discovery_check_duration_seconds': (
+        SUMMARY, 'Time of matching tests with deployment of cluster'),
+    'ostf_test_runs_started_total': (
+        COUNTER, 'Test runs started'),
+    'ostf_runner_processes_started_total': (
+        COUNTER, 'Processes forked to execute test runs'),
+    'ostf_test_run_duration_seconds': (
+        SUMMARY, 'Time of execution of test runs'),
+    'ostf_test_results_total': (
+        COUNTER, 'Results of tests'),
+    'ostf_test_duration_seconds': (
+        SUMMARY, 'Time taken by tests'),
+    'ostf_result_write_duration_seconds': (
+        SUMMARY, 'Time of storing results of tests'),
+    'ostf_cleanup_duration_seconds': (
+        SUMMARY, 'Time of cleanup after stopped test runs'),
+    'ostf_cleanup_failures_total': (
+        COUNTER, 'Cleanups which failed'),
+    'ostf_test_runs_active': (
+        GAUGE, 'Test runs in progress'),
+    'ostf_tests_queued': (
+        GAUGE, 'Tests of test runs waiting to be executed'),
+}
+
+# seconds between flushes of hot paths
+FLUSH_INTERVAL = 10
+
+MERGED = 'exited.json'
+
+DIRECTORY = None
+
+# (name, labels) -> value
+_samples = {}
+_state = {'pid': None, 'started_at': None, 'flushed_at': 0}
+
+# whether SQL statements are counted
+_counting_queries = False
+
+
+def _registry():
+    if _state['pid'] != os.getpid():
+        # forked process counts on its own
+        _samples.clear()
+        _state.update(pid=os.getpid(), started_at=int(time.time() * 1000),
+                      flushed_at=0)
+    return _samples
+
+
+def _count_query(*args):
+    inc('ostf_db_queries_total')
+
+
+def configure(directory, reset=False):
+    '''
+    Sets up the directory of flushed metrics and counting of SQL
+    statements. Server calls it with reset on its start, counters
+    of its previous run are dropped then.
+    '''
+    global DIRECTORY, _counting_queries
+
+    if not _counting_queries:
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+        _counting_queries = True
+
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        if reset:
+            for filename in os.listdir(directory):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(directory, filename))
+    except OSError:
+        LOG.warning('Metrics directory %s is not usable, only metrics '
+                    'of the process serving /metrics are exposed',
+                    directory, exc_info=True)
+        return
+    DIRECTORY = directory
+
+
+def inc(name, value=1, **labels):
+    samples = _registry()
+    key = (name, tuple(sorted(labels.items())))
+    samples[key] = samples.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    inc(name + '_count', 1, **labels)
+    inc(name + '_sum', value, **labels)
+
+
+@contextmanager
+def timed(name, **labels):
+    start = time.time()
+    try:
+        yield
+    finally:
+        observe(name, time.time() - start, **labels)
+
+
+def timer(name, **labels):
+    '''Decorator observing time of every call of function.'''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _path(pid, started_at):
+    return os.path.join(DIRECTORY, '{0}-{1}.json'.format(pid, started_at))
+
+
+def _dump(path, samples):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump([[name, labels, value]
+                   for (name, labels), value in samples.items()], f)
+    os.rename(tmp, path)
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return dict(((name, tuple(tuple(label) for label in labels)),
+                         value) for name, labels, value in json.load(f))
+    except (IOError, ValueError):
+        # removed or merged meanwhile
+        return {}
+
+
+def _add(totals, samples):
+    for key, value in samples.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+def flush(min_interval=0):
+    '''
+    Writes counters of the process into DIRECTORY, unless it was
+    done less than min_interval seconds ago.
+    '''
+    samples = _registry()
+    now = time.time()
+    if DIRECTORY is None or now - _state['flushed_at'] < min_interval:
+        return
+    _state['flushed_at'] = now
+    try:
+        _dump(_path(_state['pid'], _state['started_at']), samples)
+    except (IOError, OSError):
+        LOG.exception('Failed to flush metrics')
+
+
+def collect():
+    '''Returns samples summed over all processes.'''
+    if DIRECTORY is None:
+        return dict(_registry())
+    flush()
+
+    totals = {}
+    with open(os.path.join(DIRECTORY, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        merged, exited = _load(os.path.join(DIRECTORY, MERGED)), []
+        _add(totals, merged)
+
+        for filename in os.listdir(DIRECTORY):
+            if not filename.endswith('.json') or filename == MERGED:
+                continue
+            path = os.path.join(DIRECTORY, filename)
+            samples = _load(path)
+            _add(totals, samples)
+            if not _is_alive(int(filename.split('-')[0])):
+                _add(merged, samples)
+                exited.append(path)
+
+        if exited:
+            _dump(os.path.join(DIRECTORY, MERGED), merged)
+            for path in exited:
+                os.remove(path)
+    return totals
+
+
+def _escape(value):
+    return unicode(value).replace('\\', r'\\')\
+        .replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join('{0}="{1}"'.format(key, _escape(val))
+                               for key, val in labels) + '}'
+    return u'{0} {1}'.format(name, repr(float(value)))
+
+
+def render(samples):
+    '''Formats samples as Prometheus text exposition.'''
+    by_metric = {}
+    for (name, labels), value in samples.items():
+        metric = name
+        for suffix in ('_count', '_sum'):
+            if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                metric = name[:-len(suffix)]
+        by_metric.setdefault(metric, []).append((name, labels, value))
+
+    lines = []
+    for metric in sorted(by_metric):
+        kind, description = METRICS.get(metric, ('untyped', ''))
+        lines.append('# HELP {0} {1}'.format(metric, description))
+        lines.append('# TYPE {0} {1}'.format(metric, kind))
+        lines.extend(_format_sample(*sample)
+                     for sample in sorted(by_metric[metric]))
+    return u'\n'.join(lines) + u'\n'
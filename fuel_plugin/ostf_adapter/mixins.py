@@ -15,9 +15,11 @@
 
 import requests
 from pecan import conf
+from sqlalchemy import func, select
 from sqlalchemy.orm import joinedload
 import logging
 
+from fuel_plugin.ostf_adapter import metrics
 from fuel_plugin.ostf_adapter.storage import models
 from fuel_plugin.ostf_adapter.nose_plugin import nose_utils
 
@@ -31,6 +33,11 @@ NAILGUN_API_URL = 'api/clusters/{0}'
 
 TEST_REPOSITORY = []
 
+# name of the db counter of test repository, bumped by every discovery
+REPOSITORY = 'test_repository'
+# version of the counter TEST_REPOSITORY was cached for
+REPOSITORY_VERSION = None
+
 
 def clean_db(session):
     session.query(models.ClusterTestingPattern).delete()
@@ -41,6 +48,11 @@ def clean_db(session):
 
 
 def cache_test_repository(session):
+    global REPOSITORY_VERSION
+
+    del TEST_REPOSITORY[:]
+    REPOSITORY_VERSION = models.CacheVersion.get(session, REPOSITORY)
+
     test_repository = session.query(models.TestSet)\
         .options(joinedload('tests'))\
         .all()
@@ -61,8 +73,21 @@ def cache_test_repository(session):
         TEST_REPOSITORY.append(data_elem)
 
 
-def discovery_check(session, cluster):
-    cluster_deployment_args = _get_cluster_depl_tags(cluster)
+def refresh_test_repository(session):
+    '''
+    Caches test repository again if it was discovered anew
+    by other process of the server.
+    '''
+    if models.CacheVersion.get(session, REPOSITORY) != REPOSITORY_VERSION:
+        LOG.info('Test repository changed, caching it again')
+        cache_test_repository(session)
+
+
+@metrics.timer('ostf_discovery_check_duration_seconds')
+def discovery_check(session, cluster, deployment_tags=None):
+    if deployment_tags is None:
+        deployment_tags = _get_cluster_depl_tags(cluster)
+    cluster_deployment_args = deployment_tags
 
     cluster_data = {
         'cluster_id': cluster,
@@ -73,6 +98,18 @@ def discovery_check(session, cluster):
         .filter_by(id=cluster_data['cluster_id'])\
         .first()
 
+    if cluster_state and \
+            set(cluster_state.deployment_tags) == deployment_tags:
+        return
+
+    # other processes of the server may be discovering the cluster
+    # too, the lock is released with the end of transaction
+    session.execute(select([func.pg_advisory_xact_lock(int(cluster))]))
+    cluster_state = session.query(models.ClusterState)\
+        .filter_by(id=cluster_data['cluster_id'])\
+        .populate_existing()\
+        .first()
+
     if not cluster_state:
         session.add(
             models.ClusterState(
@@ -103,6 +140,7 @@ def discovery_check(session, cluster):
         session.merge(cluster_state)
 
 
+@metrics.timer('ostf_nailgun_fetch_duration_seconds')
 def _get_cluster_depl_tags(cluster_id):
     cluster_url = NAILGUN_API_URL.format(cluster_id)
     request_url = URL.format(conf.nailgun.host,
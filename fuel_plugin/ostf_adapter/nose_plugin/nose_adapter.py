@@ -16,12 +16,14 @@ import fcntl
 import os
 import logging
 import signal
+import time
 
 from pecan import conf
 
+from fuel_plugin.ostf_adapter import metrics
 from fuel_plugin.ostf_adapter.nose_plugin import nose_test_runner
 from fuel_plugin.ostf_adapter.nose_plugin import nose_utils
-from fuel_plugin.ostf_adapter.storage import engine, models
+from fuel_plugin.ostf_adapter.storage import engine, models, test_logs
 from fuel_plugin.ostf_adapter.nose_plugin import nose_storage_plugin
 
 
@@ -40,13 +42,15 @@ class NoseDriver(object):
     def __init__(self):
         LOG.warning('Initializing Nose Driver')
 
-    def run(self, test_run, test_set, dbpath, tests=None):
+    def _get_argv(self, test_run, test_set, tests=None):
         tests = tests or test_run.enabled_tests
         if tests:
-            argv_add = [nose_utils.modify_test_name_for_nose(test)
-                        for test in tests]
-        else:
-            argv_add = [test_set.test_path] + test_set.additional_arguments
+            return [nose_utils.modify_test_name_for_nose(test)
+                    for test in tests]
+        return [test_set.test_path] + test_set.additional_arguments
+
+    def run(self, test_run, test_set, dbpath, tests=None):
+        argv_add = self._get_argv(test_run, test_set, tests)
 
         lock_path = conf.lock_dir
         test_run.pid = nose_utils.run_proc(self._run_tests,
@@ -55,15 +59,60 @@ class NoseDriver(object):
                                            test_run.id,
                                            test_run.cluster_id,
                                            argv_add).pid
+        metrics.inc('ostf_runner_processes_started_total')
+
+    def run_many(self, test_runs, dbpath):
+        '''
+        Executes test runs of one cluster one after another
+        in single process, so they share imported modules and
+        cached clients. Each test run gets pid of the process
+        once its turn comes.
+
+        :param test_runs: list of (test_run, test_set) in order
+            of execution
+        '''
+        runs = [(test_run.id, self._get_argv(test_run, test_set))
+                for test_run, test_set in test_runs]
+
+        nose_utils.run_proc(self._run_many,
+                            conf.lock_dir,
+                            dbpath,
+                            test_runs[0][0].cluster_id,
+                            runs)
+        metrics.inc('ostf_runner_processes_started_total')
+
+    def _run_many(self, lock_path, dbpath, cluster_id, runs):
+        for test_run_id, argv_add in runs:
+            with engine.contexted_session(dbpath) as session:
+                waiting = session.query(models.Test)\
+                    .filter_by(test_run_id=test_run_id,
+                               status='wait_running')\
+                    .count()
+                if not waiting:
+                    # stopped before its turn came
+                    models.TestRun.update_test_run(
+                        session, test_run_id, {'status': 'finished'})
+                    continue
+                models.TestRun.update_test_run(
+                    session, test_run_id, {'pid': os.getpid()})
+
+            self._run_tests(lock_path, dbpath,
+                            test_run_id, cluster_id, argv_add)
 
     def _run_tests(self, lock_path, dbpath,
                    test_run_id, cluster_id, argv_add):
         cleanup_flag = False
+        started_at = time.time()
 
         def raise_exception_handler(signum, stack_frame):
             raise InterruptTestRunException()
         signal.signal(signal.SIGUSR1, raise_exception_handler)
 
+        log_handler = test_logs.TestLogHandler(
+            conf.test_logs.path, test_run_id,
+            max_bytes=int(conf.test_logs.max_size))
+        logging.getLogger().addHandler(log_handler)
+
         with engine.contexted_session(dbpath) as session:
             testrun = session.query(models.TestRun)\
                 .filter_by(id=test_run_id)\
@@ -83,7 +132,8 @@ class NoseDriver(object):
 
                 nose_test_runner.SilentTestProgram(
                     addplugins=[nose_storage_plugin.StoragePlugin(
-                        session, test_run_id, str(cluster_id))],
+                        session, test_run_id, str(cluster_id),
+                        test_set=testrun.test_set_id)],
                     exit=False,
                     argv=['ostf_tests'] + argv_add)
 
@@ -107,12 +157,20 @@ class NoseDriver(object):
                     fcntl.flock(fd, fcntl.LOCK_UN)
                     fd.close()
 
+                logging.getLogger().removeHandler(log_handler)
+                log_handler.close()
+
                 if cleanup_flag:
                     self._clean_up(session,
                                    test_run_id,
                                    cluster_id,
                                    testrun.test_set.cleanup_path)
 
+                metrics.observe('ostf_test_run_duration_seconds',
+                                time.time() - started_at,
+                                test_set=testrun.test_set_id)
+                metrics.flush()
+
     def kill(self, test_run):
         try:
             if test_run.pid:
@@ -136,9 +194,12 @@ class NoseDriver(object):
             os.environ['NAILGUN_PORT'] = str(conf.nailgun.port)
             os.environ['CLUSTER_ID'] = str(cluster_id)
 
-            module_obj.cleanup.cleanup(cluster_deployment_info)
+            with metrics.timed('ostf_cleanup_duration_seconds',
+                               cleanup=cleanup):
+                module_obj.cleanup.cleanup(cluster_deployment_info)
 
         except Exception:
+            metrics.inc('ostf_cleanup_failures_total', cleanup=cleanup)
             LOG.exception(
                 'Cleanup error. Test Run ID %s. Cluster ID %s',
                 test_run_id,
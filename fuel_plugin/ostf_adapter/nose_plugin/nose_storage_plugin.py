@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import inspect
 from time import time
 import logging
 import os
@@ -19,6 +20,9 @@ from nose import plugins
 from pecan import conf
 import unittest2
 
+from fuel_health.common import log as tests_log
+from fuel_health.common import waiters
+from fuel_plugin.ostf_adapter import metrics
 from fuel_plugin.ostf_adapter.nose_plugin import nose_utils
 from fuel_plugin.ostf_adapter.storage import models
 
@@ -31,10 +35,11 @@ class StoragePlugin(plugins.Plugin):
     name = 'storage'
     score = 15000
 
-    def __init__(self, session, test_run_id, cluster_id):
+    def __init__(self, session, test_run_id, cluster_id, test_set=None):
         self.session = session
         self.test_run_id = test_run_id
         self.cluster_id = cluster_id
+        self.test_set = test_set
         super(StoragePlugin, self).__init__()
         self._start_time = None
 
@@ -64,14 +69,21 @@ class StoragePlugin(plugins.Plugin):
 
         tests_to_update = nose_utils.get_tests_ids_to_update(test)
 
-        for test_id in tests_to_update:
-            models.Test.add_result(
-                self.session,
-                self.test_run_id,
-                test_id,
-                data
-            )
-        self.session.commit()
+        with metrics.timed('ostf_result_write_duration_seconds'):
+            for test_id in tests_to_update:
+                models.Test.add_result(
+                    self.session,
+                    self.test_run_id,
+                    test_id,
+                    data
+                )
+            self.session.commit()
+
+        if status != 'running':
+            metrics.inc('ostf_test_results_total', status=status)
+            metrics.observe('ostf_test_duration_seconds',
+                            data['time_taken'], test_set=self.test_set)
+        metrics.flush(metrics.FLUSH_INTERVAL)
 
     def addSuccess(self, test, capt=None):
         self._add_message(test, status='success')
@@ -92,9 +104,36 @@ class StoragePlugin(plugins.Plugin):
             self._add_message(test, err=err, status='error')
 
     def beforeTest(self, test):
+        tests_log.set_test_name(test.id())
         self._start_time = time()
         self._add_message(test, status='running')
 
+    def afterTest(self, test):
+        # waits done since the previous test, to help tuning intervals
+        for name, item in sorted(waiters.summary().items()):
+            LOG.info('%s: %d waits, %d succeeded, %.1f probes and '
+                     '%.1f s on average', name, item['waits'],
+                     item['succeeded'], item['probes'], item['elapsed'])
+        waiters.STATS.clear()
+
+        # what runs next in the class is either the next test or the
+        # class teardown
+        test_class = getattr(test, 'test', test).__class__
+        tests_log.set_test_name(self._fixture_name(test_class,
+                                                   'tearDownClass'))
+
+    def startContext(self, context):
+        if inspect.isclass(context):
+            tests_log.set_test_name(self._fixture_name(context,
+                                                       'setUpClass'))
+
+    def stopContext(self, context):
+        tests_log.set_test_name(None)
+
+    @staticmethod
+    def _fixture_name(cls, fixture):
+        return "%s.%s.%s" % (cls.__module__, cls.__name__, fixture)
+
     def describeTest(self, test):
         return test.test._testMethodDoc
 
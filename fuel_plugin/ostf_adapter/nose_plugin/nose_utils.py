@@ -12,18 +12,24 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import cPickle as pickle
 import itertools
 import traceback
 import re
 import json
 import os
 import multiprocessing
+import subprocess
+import sys
 
 import logging
 
 from nose import case
+import pecan
 from nose.suite import ContextSuite
 
+from fuel_plugin.ostf_adapter import green
+
 LOG = logging.getLogger(__name__)
 
 
@@ -131,7 +137,29 @@ def format_failure_message(message):
     return None, message
 
 
+def _exec_proc(func, *args):
+    proc = subprocess.Popen(
+        [sys.executable, '-m',
+         'fuel_plugin.ostf_adapter.nose_plugin.runner_main'],
+        stdin=subprocess.PIPE, close_fds=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    proc.stdin.write(pickle.dumps(
+        (type(func.__self__), func.__name__, args, pecan.conf.to_dict()),
+        pickle.HIGHEST_PROTOCOL))
+    proc.stdin.close()
+    return proc
+
+
 def run_proc(func, *args):
+    '''
+    Calls func in new process, returns object with its pid.
+
+    Server patched by green.patch() executes a fresh interpreter
+    (runner_main), which runs func unpatched; func has to be method
+    of class constructed without arguments then.
+    '''
+    if green.is_patched():
+        return _exec_proc(func, *args)
     proc = multiprocessing.Process(
         target=func,
         args=args)
@@ -0,0 +1,47 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Entry point of test run processes of a green_io server.
+
+Sockets of the server are patched by gevent, which forked processes
+would keep; tests however use real threads (paramiko transports,
+misc.run_concurrently) that cannot read gevent sockets. So the server
+executes a fresh interpreter instead of forking, see
+nose_utils.run_proc, and passes it the method to call with its
+arguments and the configuration of the server, pickled on stdin.
+'''
+
+import cPickle as pickle
+import sys
+
+import pecan
+
+from fuel_plugin.ostf_adapter import logger
+from fuel_plugin.ostf_adapter import metrics
+
+
+def main():
+    cls, method, args, config = pickle.load(sys.stdin)
+    sys.stdin.close()
+
+    logger.setup(log_file=config.get('log_file'))
+    pecan.conf.update(config)
+    metrics.configure(pecan.conf.metrics_dir)
+
+    getattr(cls(), method)(*args)
+
+
+if __name__ == '__main__':
+    main()
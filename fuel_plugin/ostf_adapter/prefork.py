@@ -0,0 +1,193 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Pre-forking server, used by ostf-server --workers N.
+
+Master process binds the listening socket, prepares the application and
+forks workers, which accept connections from the shared socket each in
+its own gevent server. Master only supervises them:
+
+    SIGHUP          graceful restart: calls on_reload (test discovery,
+                    which keeps test runs), starts new workers, then
+                    stops the old ones
+    SIGTERM/SIGINT  graceful shutdown
+
+Stopped worker finishes requests in progress (up to graceful_timeout)
+and exits without terminating test run processes it has forked; they
+report to db on their own and are stopped by their pid, so whichever
+worker gets the request.
+'''
+
+import errno
+import logging
+import os
+import signal
+import time
+
+import gevent
+from gevent import pywsgi
+from gevent import socket
+
+
+LOG = logging.getLogger(__name__)
+
+# gevent < 1.5 names it signal
+_signal_handler = getattr(gevent, 'signal_handler', None) or gevent.signal
+
+
+def listen(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+class Arbiter(object):
+    '''
+    :param listener: bound and listening socket
+    :param post_fork: called in worker with its index before serving,
+        e.g. to start background jobs in the first worker only
+    :param on_reload: called in master on SIGHUP before new workers
+        are forked
+    :param spawn: spawn argument of gevent server of worker, e.g.
+        number of requests served at once
+    '''
+
+    def __init__(self, listener, application, workers,
+                 graceful_timeout=30, post_fork=None, on_reload=None,
+                 spawn='default'):
+        self.listener = listener
+        self.application = application
+        self.spawn = spawn
+        self.number = workers
+        self.graceful_timeout = graceful_timeout
+        self.post_fork = post_fork
+        self.on_reload = on_reload
+
+        # pid -> (generation, index)
+        self.workers = {}
+        self.generation = 0
+        self._stopping = False
+        self._reloading = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        # workers must be waited for
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+        LOG.info('Master %s starting %s workers', os.getpid(), self.number)
+        while not self._stopping:
+            if self._reloading:
+                self._reloading = False
+                self.reload()
+            self._reap()
+            self._spawn_missing()
+            time.sleep(1)
+
+        self._terminate(self.workers.keys())
+        self._wait(self.graceful_timeout + 5)
+        self._terminate(self.workers.keys(), signal.SIGKILL)
+        LOG.info('Master %s stopped', os.getpid())
+
+    def reload(self):
+        LOG.info('Restarting workers')
+        if self.on_reload is not None:
+            try:
+                self.on_reload()
+            except Exception:
+                LOG.exception('Reload failed, workers are kept')
+                return
+        old = list(self.workers)
+        self.generation += 1
+        self._spawn_missing()
+        self._terminate(old)
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reloading = True
+
+    def _spawn_missing(self):
+        running = set(index for generation, index in self.workers.values()
+                      if generation == self.generation)
+        for index in range(self.number):
+            if index not in running:
+                self._spawn(index)
+
+    def _spawn(self, index):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = (self.generation, index)
+            return
+        try:
+            self._serve(index)
+        except Exception:
+            LOG.exception('Worker %s failed', os.getpid())
+        finally:
+            # atexit handlers of multiprocessing would terminate
+            # running test runs forked by the worker
+            os._exit(0)
+
+    def _serve(self, index):
+        gevent.reinit()
+        for signum in (signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        # master stops workers on Ctrl-C
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # test run processes are reaped automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        server = pywsgi.WSGIServer(self.listener, self.application,
+                                   spawn=self.spawn)
+        _signal_handler(signal.SIGTERM, server.stop, self.graceful_timeout)
+        if self.post_fork is not None:
+            self.post_fork(index)
+
+        LOG.info('Worker %s serving', os.getpid())
+        server.serve_forever()
+        LOG.info('Worker %s stopped', os.getpid())
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as e:
+                if e.errno == errno.ECHILD:
+                    return
+                raise
+            if not pid:
+                return
+            generation, index = self.workers.pop(pid, (None, None))
+            if generation == self.generation and not self._stopping:
+                LOG.warning('Worker %s exited with status %s, restarting',
+                            pid, status)
+
+    def _terminate(self, pids, signum=signal.SIGTERM):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except OSError as e:
+                if e.errno != errno.ESRCH:
+                    raise
+
+    def _wait(self, timeout):
+        deadline = time.time() + timeout
+        while self.workers and time.time() < deadline:
+            self._reap()
+            time.sleep(0.1)
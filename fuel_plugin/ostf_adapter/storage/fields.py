@@ -14,20 +14,56 @@
 
 import json
 
+from sqlalchemy import type_coerce
 from sqlalchemy.types import TypeDecorator, VARCHAR
 
+try:
+    from sqlalchemy.dialects.postgresql import JSONB
+except ImportError:
+    # SQLAlchemy older than 0.9.7
+    JSONB = None
+
+
+def is_native(dialect):
+    '''
+    Whether json columns are stored as JSONB with given dialect,
+    which needs PostgreSQL 9.4 or newer.
+    '''
+    return (JSONB is not None and dialect.name == 'postgresql' and
+            (dialect.server_version_info or ()) >= (9, 4))
+
+
+def json_column(column):
+    '''
+    Returns expression of JsonField column supporting JSONB operators,
+    so meta fields can be filtered in SQL (PostgreSQL 9.4+ only):
+
+    >>query.filter(json_column(TestRun.meta)['cluster_id'].astext == '1')
+    >>query.filter(json_column(Test.meta).contains({'slow': True}))
+    '''
+    return type_coerce(column, JSONB)
+
 
 class JsonField(TypeDecorator):
+    '''
+    Json document stored as JSONB on PostgreSQL 9.4+, where driver
+    decodes it, and as serialized text otherwise.
+    '''
     impl = VARCHAR
 
+    def load_dialect_impl(self, dialect):
+        if is_native(dialect):
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(VARCHAR())
+
     def process_bind_param(self, value, dialect):
-        if value is not None:
+        if value is not None and not is_native(dialect):
             value = json.dumps(value)
 
         return value
 
     def process_result_value(self, value, dialect):
-        if value is not None:
+        if value is not None and not is_native(dialect):
             value = json.loads(value)
         return value
 
@@ -0,0 +1,23 @@
+"""test_run_version
+
+Revision ID: 1f3c5e8a7b42
+Revises: 4e8f2a7c9d10
+Create Date: 2014-04-02 11:18:53.204716
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '1f3c5e8a7b42'
+down_revision = '4e8f2a7c9d10'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('test_runs', sa.Column('version', sa.Integer(),
+                                         nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('test_runs', 'version')
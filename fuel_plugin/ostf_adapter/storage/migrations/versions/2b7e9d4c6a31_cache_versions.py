@@ -0,0 +1,26 @@
+"""cache_versions
+
+Revision ID: 2b7e9d4c6a31
+Revises: 1f3c5e8a7b42
+Create Date: 2014-04-07 15:02:41.830592
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '2b7e9d4c6a31'
+down_revision = '1f3c5e8a7b42'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'))
+
+
+def downgrade():
+    op.drop_table('cache_versions')
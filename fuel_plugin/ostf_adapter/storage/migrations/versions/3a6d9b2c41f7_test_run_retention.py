@@ -0,0 +1,43 @@
+"""test_run_retention
+
+Revision ID: 3a6d9b2c41f7
+Revises: 54904076d82d
+Create Date: 2014-03-20 12:41:07.318402
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3a6d9b2c41f7'
+down_revision = '54904076d82d'
+
+from alembic import op
+import sqlalchemy as sa
+
+from fuel_plugin.ostf_adapter.storage import fields
+
+
+def upgrade():
+    op.create_table(
+        'test_runs_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('cluster_id', sa.Integer(), nullable=True),
+        sa.Column('test_set_id', sa.String(length=128), nullable=True),
+        sa.Column('meta', fields.JsonField(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('ended_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.Column('summary', fields.JsonField(), nullable=True),
+        sa.Column('results', sa.LargeBinary(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_test_runs_archive_cluster_test_set',
+                    'test_runs_archive', ['cluster_id', 'test_set_id'])
+    op.create_index('ix_test_runs_cluster_test_set',
+                    'test_runs', ['cluster_id', 'test_set_id', 'id'])
+    op.create_index('ix_tests_test_run_id', 'tests', ['test_run_id'])
+
+
+def downgrade():
+    op.drop_index('ix_tests_test_run_id')
+    op.drop_index('ix_test_runs_cluster_test_set')
+    op.drop_table('test_runs_archive')
@@ -0,0 +1,46 @@
+"""jsonb_fields
+
+Revision ID: 4e8f2a7c9d10
+Revises: 3a6d9b2c41f7
+Create Date: 2014-03-27 15:02:44.610958
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4e8f2a7c9d10'
+down_revision = '3a6d9b2c41f7'
+
+from alembic import op
+
+from fuel_plugin.ostf_adapter.storage import fields
+
+
+# columns of fields.JsonField and fields.ListField type
+JSON_COLUMNS = (
+    ('test_sets', 'meta'),
+    ('test_sets', 'additional_arguments'),
+    ('tests', 'meta'),
+    ('test_runs', 'meta'),
+    ('test_runs_archive', 'meta'),
+    ('test_runs_archive', 'summary'),
+)
+
+
+def upgrade():
+    if not fields.is_native(op.get_bind().dialect):
+        # columns stay VARCHAR before PostgreSQL 9.4
+        return
+    for table, column in JSON_COLUMNS:
+        op.execute('ALTER TABLE {0} ALTER COLUMN {1} TYPE jsonb '
+                   'USING {1}::jsonb'.format(table, column))
+    op.execute('CREATE INDEX ix_test_runs_meta ON test_runs '
+               'USING gin (meta jsonb_path_ops)')
+
+
+def downgrade():
+    if not fields.is_native(op.get_bind().dialect):
+        return
+    op.execute('DROP INDEX ix_test_runs_meta')
+    for table, column in JSON_COLUMNS:
+        op.execute('ALTER TABLE {0} ALTER COLUMN {1} TYPE varchar '
+                   'USING {1}::text'.format(table, column))
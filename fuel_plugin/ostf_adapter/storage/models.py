@@ -22,7 +22,7 @@ from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import joinedload, relationship, object_mapper
 from sqlalchemy.dialects.postgres import ARRAY
 
-from fuel_plugin.ostf_adapter import nose_plugin
+from fuel_plugin.ostf_adapter import metrics, nose_plugin
 from fuel_plugin.ostf_adapter.storage import fields, engine
 
 
@@ -74,6 +74,36 @@ class ClusterTestingPattern(BASE):
     test_set = relationship('TestSet')
 
 
+class CacheVersion(BASE):
+    '''
+    Version counters of data cached by every process
+    of the server. Process rebuilds its cache once
+    the counter differs from the version it was built for.
+    '''
+
+    __tablename__ = 'cache_versions'
+
+    name = sa.Column(sa.String(64), primary_key=True)
+    version = sa.Column(sa.Integer, nullable=False, default=0)
+
+    @classmethod
+    def get(cls, session, name):
+        return session.query(cls.version)\
+            .filter_by(name=name)\
+            .scalar() or 0
+
+    @classmethod
+    def bump(cls, session, name):
+        updated = session.query(cls)\
+            .filter_by(name=name)\
+            .update({'version': cls.version + 1},
+                    synchronize_session=False)
+        if not updated:
+            session.add(cls(name=name, version=1))
+        session.flush()
+        return cls.get(session, name)
+
+
 class TestSet(BASE):
 
     __tablename__ = 'test_sets'
@@ -143,7 +173,8 @@ class Test(BASE):
         sa.ForeignKey(
             'test_runs.id',
             ondelete='CASCADE'
-        )
+        ),
+        index=True
     )
 
     test_set_id = sa.Column(
@@ -173,6 +204,7 @@ class Test(BASE):
         session.query(cls).\
             filter_by(name=test_name, test_run_id=test_run_id).\
             update(data, synchronize_session=False)
+        TestRun.touch(session, test_run_id)
 
     @classmethod
     def update_running_tests(cls, session, test_run_id, status='stopped'):
@@ -180,6 +212,7 @@ class Test(BASE):
             filter(cls.test_run_id == test_run_id,
                    cls.status.in_(('running', 'wait_running'))). \
             update({'status': status}, synchronize_session=False)
+        TestRun.touch(session, test_run_id)
 
     @classmethod
     def update_test_run_tests(cls, session, test_run_id,
@@ -189,6 +222,7 @@ class Test(BASE):
                    cls.test_run_id == test_run_id). \
             update({'status': status, 'time_taken': None},
                    synchronize_session=False)
+        TestRun.touch(session, test_run_id)
 
     def copy_test(self, test_run, predefined_tests):
         '''
@@ -226,6 +260,10 @@ class TestRun(BASE):
     started_at = sa.Column(sa.DateTime, default=datetime.utcnow)
     ended_at = sa.Column(sa.DateTime)
     pid = sa.Column(sa.Integer)
+    # incremented on every change of test run or its tests,
+    # identifies state of test run in ETags of the API
+    version = sa.Column(sa.Integer, nullable=False,
+                        default=0, server_default='0')
 
     test_set_id = sa.Column(sa.String(128))
     cluster_id = sa.Column(sa.Integer)
@@ -237,6 +275,8 @@ class TestRun(BASE):
              'cluster_testing_pattern.cluster_id'],
             ondelete='CASCADE'
         ),
+        sa.Index('ix_test_runs_cluster_test_set',
+                 'cluster_id', 'test_set_id', 'id'),
         {}
     )
 
@@ -254,6 +294,7 @@ class TestRun(BASE):
 
     def update(self, status):
         self.status = status
+        self.version = (self.version or 0) + 1
         if status == 'finished':
             self.ended_at = datetime.utcnow()
 
@@ -340,10 +381,17 @@ class TestRun(BASE):
         if updated_data.get('status') in ['finished']:
             updated_data['ended_at'] = datetime.utcnow()
 
+        updated_data = dict(updated_data, version=cls.version + 1)
         session.query(cls). \
             filter(cls.id == test_run_id). \
             update(updated_data, synchronize_session=False)
 
+    @classmethod
+    def touch(cls, session, test_run_id):
+        session.query(cls). \
+            filter(cls.id == test_run_id). \
+            update({'version': cls.version + 1}, synchronize_session=False)
+
     @classmethod
     def is_last_running(cls, session, test_set, cluster_id):
         '''
@@ -366,12 +414,65 @@ class TestRun(BASE):
 
             # flush test_run data to db
             session.commit()
+            metrics.inc('ostf_test_runs_started_total',
+                        test_set=test_set.id)
 
             plugin.run(test_run, test_set, dbpath)
 
             return test_run.frontend
         return {}
 
+    @classmethod
+    def start_many(cls, session, test_runs, dbpath):
+        '''
+        Creates test runs in one transaction and starts them.
+        Test runs of not exclusive test sets of the same cluster
+        are executed by one worker in order of their
+        test_runs_ordering_priority, if driver supports it.
+
+        :param test_runs: list of (test_set, metadata, tests)
+        :returns: frontend data of started test runs,
+            {} for test sets which are still running
+        '''
+        started = []
+        for test_set, metadata, tests in test_runs:
+            test_run = None
+            if cls.is_last_running(session, test_set.id,
+                                   metadata['cluster_id']):
+                test_run = cls.add_test_run(
+                    session, test_set.id,
+                    metadata['cluster_id'], tests=tests)
+                metrics.inc('ostf_test_runs_started_total',
+                            test_set=test_set.id)
+            started.append((test_run, test_set))
+
+        # flush all test_runs data to db at once
+        session.commit()
+
+        shared = {}
+        for test_run, test_set in started:
+            if test_run is None:
+                continue
+            plugin = nose_plugin.get_plugin(test_set.driver)
+            if test_set.exclusive_testsets or \
+                    not hasattr(plugin, 'run_many'):
+                plugin.run(test_run, test_set, dbpath)
+            else:
+                shared.setdefault((test_set.driver, test_run.cluster_id),
+                                  []).append((test_run, test_set))
+
+        for (driver, cluster_id), group in shared.items():
+            plugin = nose_plugin.get_plugin(driver)
+            if len(group) == 1:
+                plugin.run(group[0][0], group[0][1], dbpath)
+            else:
+                group.sort(
+                    key=lambda item: item[1].test_runs_ordering_priority)
+                plugin.run_many(group, dbpath)
+
+        return [test_run.frontend if test_run else {}
+                for test_run, test_set in started]
+
     def restart(self, session, dbpath, tests=None):
         """Restart test run with
             if tests given they will be enabled
@@ -395,7 +496,35 @@ class TestRun(BASE):
         """
         plugin = nose_plugin.get_plugin(self.test_set.driver)
         killed = plugin.kill(self)
-        if killed:
+        # test run waiting in shared worker has no pid yet
+        if killed or (self.pid is None and self.status == 'running'):
             Test.update_running_tests(
                 session, self.id, status='stopped')
         return self.frontend
+
+
+class TestRunArchive(BASE):
+    '''
+    Compact record of test run removed by retention.
+    Results of its tests are kept as zlib compressed
+    json list, see storage.retention.
+    '''
+
+    __tablename__ = 'test_runs_archive'
+
+    id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
+    cluster_id = sa.Column(sa.Integer())
+    test_set_id = sa.Column(sa.String(128))
+    meta = sa.Column(fields.JsonField())
+    started_at = sa.Column(sa.DateTime)
+    ended_at = sa.Column(sa.DateTime)
+    archived_at = sa.Column(sa.DateTime, default=datetime.utcnow)
+    # number of tests per status
+    summary = sa.Column(fields.JsonField())
+    results = sa.Column(sa.LargeBinary())
+
+    __table_args__ = (
+        sa.Index('ix_test_runs_archive_cluster_test_set',
+                 'cluster_id', 'test_set_id'),
+        {}
+    )
@@ -0,0 +1,250 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Retention of test run history.
+
+Finished test runs which exceed the age or count limit of the policy of
+their cluster and test set are moved into test_runs_archive (one row
+per run, results of its tests compressed) and deleted together with
+their tests. Runs are removed in bounded batches, each committed on its
+own, so requests of the API never wait for the whole cleanup. The last
+test run of every cluster and test set is always kept, as both the API
+and the start of new runs depend on it.
+'''
+
+from datetime import datetime, timedelta
+import json
+import logging
+import zlib
+
+from sqlalchemy import desc
+
+from fuel_plugin.ostf_adapter.storage import models, test_logs
+
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+# columns copied into archive, the rest are copies of test templates
+ARCHIVED_TEST_ATTRS = ('name', 'status', 'step', 'time_taken',
+                       'message', 'traceback')
+
+
+class Policy(object):
+    '''
+    Limits history of the test runs of matching cluster and test set.
+
+    :param max_age: days after which finished test run is removed.
+    :param max_count: number of the most recent test runs kept.
+    Both limits are disabled by None or 0.
+    '''
+
+    def __init__(self, max_age=None, max_count=None,
+                 test_set='*', cluster_id='*'):
+        self.max_age = max_age
+        self.max_count = max_count
+        self.test_set = test_set
+        self.cluster_id = str(cluster_id)
+
+    @classmethod
+    def parse(cls, spec):
+        '''
+        Creates policy from '<test_set>:<cluster_id>:<max_age>:<max_count>'
+        string, where '*' matches any test set or cluster.
+
+        >>Policy.parse('general_test:*:7:10')
+        '''
+        try:
+            test_set, cluster_id, max_age, max_count = spec.split(':')
+            return cls(int(max_age), int(max_count), test_set, cluster_id)
+        except ValueError:
+            raise ValueError('Malformed retention policy: {0}'.format(spec))
+
+    def matches(self, test_set_id, cluster_id):
+        return (self.test_set in ('*', test_set_id) and
+                self.cluster_id in ('*', str(cluster_id)))
+
+    def is_expired(self, position, started_at, now):
+        '''
+        :param position: index of test run in its history,
+            the most recent one has 0.
+        '''
+        if self.max_count and position >= self.max_count:
+            return True
+        if self.max_age and started_at is not None:
+            return started_at < now - timedelta(days=self.max_age)
+        return False
+
+    def __repr__(self):
+        return '<Policy {0}:{1}:{2}:{3}>'.format(
+            self.test_set, self.cluster_id, self.max_age, self.max_count)
+
+
+def get_policies(specs, max_age=None, max_count=None):
+    '''
+    Returns policies parsed from specs followed by the default one
+    applied to clusters and test sets none of them matches.
+    '''
+    return [Policy.parse(spec) for spec in specs or []] + \
+        [Policy(max_age, max_count)]
+
+
+def find_expired(session, policies, now=None):
+    '''
+    Returns ids of finished test runs to be removed according to
+    the first of policies matching their cluster and test set.
+    '''
+    now = now or datetime.utcnow()
+    expired = []
+    group, position = None, 0
+
+    test_runs = session.query(models.TestRun.id,
+                              models.TestRun.cluster_id,
+                              models.TestRun.test_set_id,
+                              models.TestRun.status,
+                              models.TestRun.started_at)\
+        .order_by(models.TestRun.cluster_id,
+                  models.TestRun.test_set_id,
+                  desc(models.TestRun.id))
+
+    for test_run in test_runs:
+        if (test_run.cluster_id, test_run.test_set_id) != group:
+            group, position = (test_run.cluster_id, test_run.test_set_id), 0
+            policy = next((p for p in policies
+                           if p.matches(test_run.test_set_id,
+                                        test_run.cluster_id)), None)
+        elif (policy is not None and test_run.status == 'finished' and
+              policy.is_expired(position, test_run.started_at, now)):
+            expired.append(test_run.id)
+        position += 1
+    return expired
+
+
+def _archive(session, test_run, tests):
+    results = [[getattr(test, attr) for attr in ARCHIVED_TEST_ATTRS]
+               for test in tests]
+    summary = {}
+    for test in tests:
+        summary[test.status] = summary.get(test.status, 0) + 1
+
+    archived = models.TestRunArchive(
+        id=test_run.id,
+        cluster_id=test_run.cluster_id,
+        test_set_id=test_run.test_set_id,
+        meta=test_run.meta,
+        started_at=test_run.started_at,
+        ended_at=test_run.ended_at,
+        summary=summary,
+        results=zlib.compress(json.dumps(
+            {'fields': ARCHIVED_TEST_ATTRS, 'tests': results}))
+    )
+    session.add(archived)
+    return len(archived.results)
+
+
+def _row_size(row):
+    '''Approximate size of the data stored in row.'''
+    size = 0
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        if isinstance(value, (dict, list)):
+            size += len(json.dumps(value))
+        elif isinstance(value, basestring):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+
+def remove_batch(session, test_run_ids, archive=True):
+    '''
+    Removes given test runs which are still finished (a test run may
+    have been restarted meanwhile). Returns dict with numbers of
+    removed test runs and tests, bytes freed and archived and 'ids'
+    of removed test runs.
+    '''
+    report = {'test_runs': 0, 'tests': 0, 'bytes': 0, 'archived_bytes': 0,
+              'ids': []}
+
+    test_runs = session.query(models.TestRun)\
+        .filter(models.TestRun.id.in_(test_run_ids))\
+        .filter_by(status='finished')\
+        .with_lockmode('update')\
+        .all()
+    if not test_runs:
+        return report
+    ids = report['ids'] = [test_run.id for test_run in test_runs]
+
+    tests = {}
+    for test in session.query(models.Test)\
+            .filter(models.Test.test_run_id.in_(ids))\
+            .order_by(models.Test.name):
+        tests.setdefault(test.test_run_id, []).append(test)
+        report['bytes'] += _row_size(test)
+
+    for test_run in test_runs:
+        report['bytes'] += _row_size(test_run)
+        if archive:
+            report['archived_bytes'] += _archive(
+                session, test_run, tests.get(test_run.id, []))
+    session.flush()
+
+    report['tests'] = session.query(models.Test)\
+        .filter(models.Test.test_run_id.in_(ids))\
+        .delete(synchronize_session=False)
+    report['test_runs'] = session.query(models.TestRun)\
+        .filter(models.TestRun.id.in_(ids))\
+        .delete(synchronize_session=False)
+    # loaded rows are gone now
+    session.expunge_all()
+    return report
+
+
+def apply(session, policies, batch_size=DEFAULT_BATCH_SIZE, archive=True,
+          log_dir=None, now=None, pause=None):
+    '''
+    Removes expired test runs, committing each batch of them, then
+    logs captured for the removed ones. Optional pause is called
+    between batches, e.g. to let other greenlets run.
+
+    Returns dict with numbers of removed 'test_runs' and 'tests',
+    'bytes' reclaimed in db (row data minus its archive) and
+    'log_bytes' freed on disk.
+    '''
+    report = {'test_runs': 0, 'tests': 0, 'bytes': 0, 'log_bytes': 0}
+    expired = find_expired(session, policies, now)
+    session.commit()
+    removed = []
+
+    for start in range(0, len(expired), batch_size):
+        batch_report = remove_batch(
+            session, expired[start:start + batch_size], archive)
+        session.commit()
+        report['test_runs'] += batch_report['test_runs']
+        report['tests'] += batch_report['tests']
+        report['bytes'] += (batch_report['bytes'] -
+                            batch_report['archived_bytes'])
+        removed.extend(batch_report['ids'])
+        if pause is not None:
+            pause()
+
+    if log_dir:
+        report['log_bytes'] = test_logs.remove(log_dir, removed)
+
+    LOG.info('Retention removed %(test_runs)d test runs with %(tests)d '
+             'tests, reclaimed %(bytes)d bytes in db and %(log_bytes)d '
+             'bytes of logs', report)
+    return report
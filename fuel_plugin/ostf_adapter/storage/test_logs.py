@@ -0,0 +1,228 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Per test log capture.
+
+While a test run is executed its worker routes every log record into a
+gzip compressed segment of the test (or class fixture) declared by the
+runner, stored as <log_dir>/<test_run_id>/<test name>.log.gz. A segment
+is written as .part file and renamed once the next test starts, so only
+complete segments have a known length.
+'''
+
+import errno
+import gzip
+import logging
+import os
+import re
+import shutil
+import struct
+import time
+import zlib
+
+from fuel_health.common import log as tests_log
+from fuel_plugin.ostf_adapter import logger
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+SEGMENT_SUFFIX = '.log.gz'
+PART_SUFFIX = '.part'
+
+TRUNCATED_MESSAGE = '*** log truncated: %d bytes limit reached ***\n'
+
+_TEST_NAME_RE = re.compile(r'^[\w][\w.]*$')
+
+
+def run_dir(log_dir, test_run_id):
+    return os.path.join(log_dir, str(int(test_run_id)))
+
+
+def find_segment(log_dir, test_run_id, test_name):
+    '''
+    Returns path of the segment captured for given test,
+    None if the test has not logged anything (yet).
+    '''
+    if not (str(test_run_id).isdigit() and _TEST_NAME_RE.match(test_name)):
+        return None
+    path = os.path.join(run_dir(log_dir, test_run_id),
+                        test_name + SEGMENT_SUFFIX)
+    for candidate in (path, path + PART_SUFFIX):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def segment_size(path):
+    '''
+    Returns uncompressed size of complete segment,
+    None for the one which is still written.
+    '''
+    if path.endswith(PART_SUFFIX):
+        return None
+    with open(path, 'rb') as f:
+        # gzip trailer ends with the input size modulo 2^32
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack('<I', f.read(4))[0]
+
+
+def read_segment(path, start=0, stop=None, chunk_size=65536):
+    '''
+    Yields uncompressed content of the segment, optionally only
+    [start, stop) bytes of it. Segment which is still written
+    is read up to its last flushed record.
+    '''
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    position = 0
+    with open(path, 'rb') as f:
+        while stop is None or position < stop:
+            data = f.read(chunk_size)
+            if data:
+                chunk = decompressor.decompress(data)
+            elif not path.endswith(PART_SUFFIX):
+                chunk = decompressor.flush()
+            else:
+                chunk = ''
+            if not data and not chunk:
+                break
+
+            chunk_start = max(start - position, 0)
+            position += len(chunk)
+            if stop is not None and position > stop:
+                chunk = chunk[:len(chunk) - (position - stop)]
+            if chunk[chunk_start:]:
+                yield chunk[chunk_start:]
+            if not data:
+                break
+
+
+def remove_stale(log_dir, test_run_ids):
+    '''
+    Removes segments of all test runs except given ones.
+    Returns number of bytes freed.
+    '''
+    if not os.path.isdir(log_dir):
+        return 0
+    keep = set(str(test_run_id) for test_run_id in test_run_ids)
+    return sum(_remove_run_dir(os.path.join(log_dir, name))
+               for name in os.listdir(log_dir)
+               if name.isdigit() and name not in keep)
+
+
+def remove(log_dir, test_run_ids):
+    '''
+    Removes segments of given test runs.
+    Returns number of bytes freed.
+    '''
+    return sum(_remove_run_dir(run_dir(log_dir, test_run_id))
+               for test_run_id in test_run_ids)
+
+
+def _remove_run_dir(path):
+    if not os.path.isdir(path):
+        return 0
+    freed = 0
+    for segment in os.listdir(path):
+        freed += os.path.getsize(os.path.join(path, segment))
+    shutil.rmtree(path, ignore_errors=True)
+    return freed
+
+
+class TestLogHandler(logging.Handler):
+    '''
+    Routes records to the segment of the test which is declared
+    by test runner via fuel_health.common.log.set_test_name.
+    Records emitted outside of tests are ignored.
+
+    :param max_bytes: limit of uncompressed segment size,
+        records above it are dropped.
+    :param flush_interval: seconds between flushes of the segment,
+        they make recent records visible to readers.
+    '''
+
+    def __init__(self, log_dir, test_run_id, max_bytes=DEFAULT_MAX_BYTES,
+                 flush_interval=5):
+        logging.Handler.__init__(self)
+        self.log_dir = log_dir
+        self.test_run_id = test_run_id
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.setFormatter(logging.Formatter(logger.LOG_FORMAT,
+                                            logger.DATE_FORMAT))
+
+        self._test_name = None
+        self._segment = None
+        self._path = None
+        self._written = 0
+        self._flushed_at = 0
+
+    def emit(self, record):
+        try:
+            test_name = tests_log.get_test_name()
+            if test_name != self._test_name:
+                self._close_segment()
+                self._test_name = test_name
+                if test_name and _TEST_NAME_RE.match(test_name):
+                    self._open_segment(test_name)
+
+            if self._segment is None or self._written > self.max_bytes:
+                return
+
+            msg = self.format(record) + '\n'
+            if isinstance(msg, unicode):
+                msg = msg.encode('utf-8')
+            if self._written + len(msg) > self.max_bytes:
+                msg = TRUNCATED_MESSAGE % self.max_bytes
+                # no further records fit into the segment
+                self._written = self.max_bytes
+            self._segment.write(msg)
+            self._written += len(msg)
+
+            now = time.time()
+            if now - self._flushed_at >= self.flush_interval:
+                self._segment.flush()
+                self._flushed_at = now
+        except Exception:
+            self.handleError(record)
+
+    def _open_segment(self, test_name):
+        directory = run_dir(self.log_dir, self.test_run_id)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        self._path = os.path.join(directory, test_name + SEGMENT_SUFFIX)
+        # segment of the previous execution of restarted test
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        self._segment = gzip.open(self._path + PART_SUFFIX, 'wb')
+        self._written = 0
+        self._flushed_at = time.time()
+
+    def _close_segment(self):
+        if self._segment is None:
+            return
+        self._segment.close()
+        os.rename(self._path + PART_SUFFIX, self._path)
+        self._segment = None
+
+    def close(self):
+        self.acquire()
+        try:
+            self._close_segment()
+        finally:
+            self.release()
+        logging.Handler.close(self)
@@ -12,20 +12,62 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
 import json
 import logging
 
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload
-from pecan import conf, rest, expose, request
+from pecan import abort, conf, rest, expose, request
+from webob import Response
 
-from fuel_plugin.ostf_adapter import mixins
-from fuel_plugin.ostf_adapter.storage import models
+from fuel_plugin.ostf_adapter import metrics, mixins
+from fuel_plugin.ostf_adapter.storage import models, test_logs
+from fuel_plugin.ostf_adapter.wsgi import renderers
 
 
 LOG = logging.getLogger(__name__)
 
 
+def not_modified(*parts):
+    '''
+    Sets ETag computed from parts identifying state of requested
+    resource. Returns 304 response if client has the state already,
+    None otherwise.
+    '''
+    etag = hashlib.md5(
+        repr((renderers.negotiate(request),) + parts)).hexdigest()
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': 'W/"%s"' % etag})
+    request.environ[renderers.ETAG_ENVIRON_KEY] = etag
+    return None
+
+
+def _cluster_not_modified(cluster):
+    '''
+    Content of testsets and tests of the cluster depends only
+    on test repository and cluster's deployment tags.
+
+    Client having the content for tags stored by the last
+    discovery_check is answered from db; otherwise tags are
+    fetched from Nailgun and returned for discovery_check.
+    '''
+    mixins.refresh_test_repository(request.session)
+    stored_tags = request.session\
+        .query(models.ClusterState.deployment_tags)\
+        .filter_by(id=cluster)\
+        .scalar()
+    if stored_tags is not None:
+        response = not_modified(
+            mixins.REPOSITORY_VERSION, cluster, sorted(set(stored_tags)))
+        if response:
+            return None, response
+
+    deployment_tags = mixins._get_cluster_depl_tags(cluster)
+    return deployment_tags, not_modified(
+        mixins.REPOSITORY_VERSION, cluster, sorted(deployment_tags))
+
+
 class BaseRestController(rest.RestController):
     def _handle_get(self, method, remainder):
         if len(remainder):
@@ -44,7 +86,10 @@ class TestsetsController(BaseRestController):
 
     @expose('json')
     def get(self, cluster):
-        mixins.discovery_check(request.session, cluster)
+        deployment_tags, response = _cluster_not_modified(cluster)
+        if response:
+            return response
+        mixins.discovery_check(request.session, cluster, deployment_tags)
 
         needed_testsets = request.session\
             .query(models.ClusterTestingPattern.test_set_id)\
@@ -64,7 +109,10 @@ class TestsController(BaseRestController):
 
     @expose('json')
     def get(self, cluster):
-        mixins.discovery_check(request.session, cluster)
+        deployment_tags, response = _cluster_not_modified(cluster)
+        if response:
+            return response
+        mixins.discovery_check(request.session, cluster, deployment_tags)
         needed_tests_list = request.session\
             .query(models.ClusterTestingPattern.tests)\
             .filter_by(cluster_id=cluster)
@@ -85,12 +133,59 @@ class TestsController(BaseRestController):
         return {}
 
 
+class TestLogController(BaseRestController):
+
+    @expose()
+    def get_all(self, test_run_id, test_name):
+        path = test_logs.find_segment(conf.test_logs.path,
+                                      test_run_id, test_name)
+        if path is None:
+            abort(404)
+
+        response = Response(content_type='text/plain', charset='utf-8')
+        length = test_logs.segment_size(path)
+        if length is None:
+            # test is still running, no ranges until its log is complete
+            response.app_iter = test_logs.read_segment(path)
+            return response
+
+        response.accept_ranges = 'bytes'
+        start, stop = 0, length
+        if request.range:
+            content_range = request.range.content_range(length)
+            if content_range is None:
+                abort(416)
+            start, stop = content_range.start, content_range.stop
+            response.status = 206
+            response.content_range = content_range
+
+        response.app_iter = test_logs.read_segment(path, start, stop)
+        response.content_length = stop - start
+        return response
+
+
+class TestRunTestsController(BaseRestController):
+
+    log = TestLogController()
+
+    @expose('json')
+    def get_one(self, test_run_id, test_name):
+        test = request.session.query(models.Test)\
+            .filter_by(test_run_id=test_run_id, name=test_name)\
+            .first()
+        if test:
+            return test.frontend
+        return {}
+
+
 class TestrunsController(BaseRestController):
 
     _custom_actions = {
         'last': ['GET'],
     }
 
+    tests = TestRunTestsController()
+
     @expose('json')
     def get_all(self):
         test_runs = request.session.query(models.TestRun).all()
@@ -99,6 +194,14 @@ class TestrunsController(BaseRestController):
 
     @expose('json')
     def get_one(self, test_run_id):
+        version = request.session.query(models.TestRun.version)\
+            .filter_by(id=test_run_id).scalar()
+        if version is None:
+            return {}
+        response = not_modified(test_run_id, version)
+        if response:
+            return response
+
         test_run = request.session.query(models.TestRun)\
             .filter_by(id=test_run_id).first()
         if test_run and isinstance(test_run, models.TestRun):
@@ -111,6 +214,15 @@ class TestrunsController(BaseRestController):
             .group_by(models.TestRun.test_set_id)\
             .filter_by(cluster_id=cluster_id)
 
+        versions = request.session\
+            .query(models.TestRun.id, models.TestRun.version)\
+            .filter(models.TestRun.id.in_(test_run_ids))\
+            .order_by(models.TestRun.id)\
+            .all()
+        response = not_modified(cluster_id, [tuple(v) for v in versions])
+        if response:
+            return response
+
         test_runs = request.session.query(models.TestRun)\
             .options(joinedload('tests'))\
             .filter(models.TestRun.id.in_(test_run_ids))
@@ -123,29 +235,20 @@ class TestrunsController(BaseRestController):
         if 'objects' in test_runs:
             test_runs = test_runs['objects']
 
-        res = []
-
-        for test_run in test_runs:
-            test_set = test_run['testset']
-            metadata = test_run['metadata']
-            tests = test_run.get('tests', [])
-
-            test_set = models.TestSet.get_test_set(
-                request.session,
-                test_set
-            )
-
-            test_run = models.TestRun.start(
-                request.session,
-                test_set,
-                metadata,
-                tests,
-                conf.dbpath
-            )
-
-            res.append(test_run)
-
-        return res
+        test_sets = dict(
+            (test_set.id, test_set) for test_set
+            in request.session.query(models.TestSet).filter(
+                models.TestSet.id.in_(
+                    [test_run['testset'] for test_run in test_runs])))
+
+        return models.TestRun.start_many(
+            request.session,
+            [(test_sets.get(test_run['testset']),
+              test_run['metadata'],
+              test_run.get('tests', []))
+             for test_run in test_runs],
+            conf.dbpath
+        )
 
     @expose('json')
     def put(self):
@@ -167,3 +270,20 @@ class TestrunsController(BaseRestController):
                                                  conf.dbpath,
                                                  tests=tests))
         return data
+
+
+class MetricsController(rest.RestController):
+
+    @expose(content_type='text/plain')
+    def get_all(self):
+        samples = metrics.collect()
+        samples[('ostf_test_runs_active', ())] = request.session\
+            .query(func.count(models.TestRun.id))\
+            .filter_by(status='running')\
+            .scalar()
+        samples[('ostf_tests_queued', ())] = request.session\
+            .query(func.count(models.Test.id))\
+            .filter(models.Test.test_run_id.isnot(None))\
+            .filter_by(status='wait_running')\
+            .scalar()
+        return metrics.render(samples)
@@ -13,19 +13,63 @@
 #    under the License.
 
 import logging
-from sqlalchemy import create_engine, orm
+import time
+import zlib
+import gevent
+from sqlalchemy import create_engine, event, orm, pool
+from sqlalchemy.engine import url
 
 from pecan import hooks
 
+from fuel_plugin.ostf_adapter import metrics
+from fuel_plugin.ostf_adapter.wsgi import renderers
+
 
 LOG = logging.getLogger(__name__)
 
+SLOW_REQUESTS_LOG = logging.getLogger(
+    'fuel_plugin.ostf_adapter.slow_requests')
+
+
+def _endpoint(state):
+    '''Name of controller method which handled the request.'''
+    controller = state.controller
+    if controller is None:
+        return 'unknown'
+    return '{0}.{1}'.format(
+        type(getattr(controller, '__self__', None)).__name__,
+        getattr(controller, '__name__', controller))
+
+
+def _pool_options(dbpath, pool_size):
+    '''Sizing options of the pool of db engine, if it accepts them.'''
+    db_url = url.make_url(dbpath)
+    dialect = db_url.get_dialect()
+    get_pool_class = getattr(dialect, 'get_pool_class', None)
+    if get_pool_class is not None:
+        pool_class = get_pool_class(db_url)
+    else:
+        pool_class = getattr(dialect, 'poolclass', pool.QueuePool)
+    if issubclass(pool_class, pool.QueuePool):
+        return {'pool_size': pool_size}
+    return {}
+
 
 class CustomTransactionalHook(hooks.TransactionHook):
-    def __init__(self, dbpath):
-        engine = create_engine(dbpath)
-        self.session = orm.scoped_session(orm.sessionmaker())
-        self.session.configure(bind=engine)
+    def __init__(self, dbpath, scopefunc=None, pool_size=5):
+        '''
+        :param scopefunc: returns identity of the scope of a session,
+            thread by default; gevent.getcurrent gives every greenlet
+            its own session.
+        :param pool_size: db connections kept; with a session per
+            greenlet the server must not serve more requests at once,
+            as the pool waits for a free connection blocking the hub.
+        '''
+        self.engine = create_engine(dbpath,
+                                    **_pool_options(dbpath, pool_size))
+        self.session = orm.scoped_session(orm.sessionmaker(),
+                                          scopefunc=scopefunc)
+        self.session.configure(bind=self.engine)
 
         def start():
             pass
@@ -55,3 +99,120 @@ class CustomTransactionalHook(hooks.TransactionHook):
     def on_error(self, state, exc):
         super(CustomTransactionalHook, self).on_error(state, exc)
         LOG.exception('Pecan state %r', state)
+
+
+class SQLProfilingHook(hooks.PecanHook):
+    '''
+    Counts SQL statements executed by engine for every request and
+    measures their time. Sets X-Query-Count and X-DB-Time (seconds)
+    headers of response and logs requests taking more than
+    slow_threshold seconds with their statements to SLOW_REQUESTS_LOG.
+
+    Listeners are added to engine only by creating the hook, so there
+    is no cost unless profiling is enabled.
+    '''
+
+    def __init__(self, engine, slow_threshold=1.0):
+        self.slow_threshold = slow_threshold
+        # greenlet handling request -> its profile
+        self._profiles = {}
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement,
+                        parameters, context, executemany):
+        conn.info.setdefault('ostf.query_started_at', []).append(time.time())
+
+    def _after_execute(self, conn, cursor, statement,
+                       parameters, context, executemany):
+        started_at = conn.info['ostf.query_started_at'].pop()
+        profile = self._profiles.get(gevent.getcurrent())
+        if profile is not None:
+            profile['queries'].append((statement, time.time() - started_at))
+
+    def on_route(self, state):
+        self._profiles[gevent.getcurrent()] = {
+            'started_at': time.time(), 'queries': []}
+
+    def after(self, state):
+        profile = self._profiles.pop(gevent.getcurrent(), None)
+        if profile is None:
+            return
+        elapsed = time.time() - profile['started_at']
+        queries = profile['queries']
+        db_time = sum(duration for statement, duration in queries)
+
+        headers = state.response.headers
+        headers['X-Query-Count'] = str(len(queries))
+        headers['X-DB-Time'] = '%.6f' % db_time
+
+        if self.slow_threshold and elapsed >= self.slow_threshold:
+            SLOW_REQUESTS_LOG.warning(
+                '%s %s took %.3fs, %d queries took %.3fs:\n%s',
+                state.request.method, state.request.path_qs, elapsed,
+                len(queries), db_time,
+                '\n'.join('  %.6fs %s' % (duration, ' '.join(
+                    statement.split())) for statement, duration in queries))
+
+
+class ResponseEncodingHook(hooks.PecanHook):
+    '''
+    Finishes responses encoded by renderers.JsonRenderer: sets their
+    ETag and negotiated content type, compresses them with gzip when
+    client accepts it and body has at least min_size bytes, and reports
+    their size and encode time to metrics per endpoint.
+    '''
+
+    def __init__(self, min_size=1024, level=6):
+        self.min_size = min_size
+        self.level = level
+
+    def after(self, state):
+        encoding = state.request.environ.get(renderers.ENVIRON_KEY)
+        if encoding is None:
+            return
+        response = state.response
+        response.content_type = encoding['content_type']
+
+        etag = state.request.environ.get(renderers.ETAG_ENVIRON_KEY)
+        if etag is not None:
+            response.headers['ETag'] = 'W/"%s"' % etag
+
+        size = len(response.body)
+        if self.min_size and size >= self.min_size:
+            response.vary = tuple(response.vary or ()) + ('Accept-Encoding',)
+            if 'gzip' in state.request.headers.get('Accept-Encoding', ''):
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED,
+                                              16 + zlib.MAX_WBITS)
+                response.body = (compressor.compress(response.body) +
+                                 compressor.flush())
+                response.content_encoding = 'gzip'
+
+        endpoint = _endpoint(state)
+        metrics.observe('ostf_response_encode_duration_seconds',
+                        encoding['encode_time'], endpoint=endpoint)
+        metrics.observe('ostf_response_size_bytes', size,
+                        endpoint=endpoint)
+        metrics.observe('ostf_response_sent_bytes', len(response.body),
+                        endpoint=endpoint)
+
+
+class MetricsHook(hooks.PecanHook):
+    '''
+    Counts requests and their latency per endpoint and
+    pushes metrics of the process from time to time.
+    '''
+
+    def on_route(self, state):
+        state.request.environ['ostf.started_at'] = time.time()
+
+    def after(self, state):
+        started_at = state.request.environ.get('ostf.started_at')
+        endpoint = _endpoint(state)
+        metrics.inc('ostf_http_requests_total', endpoint=endpoint,
+                    method=state.request.method,
+                    status=state.response.status_int)
+        if started_at is not None:
+            metrics.observe('ostf_http_request_duration_seconds',
+                            time.time() - started_at, endpoint=endpoint)
+        metrics.flush(metrics.FLUSH_INTERVAL)
@@ -0,0 +1,94 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Encoding of API responses.
+
+JsonRenderer replaces the builtin json renderer of pecan, so every
+@expose('json') controller is encoded by the C accelerated encoder of
+json module instead of the generic encoder of pecan.jsonify. Clients
+preferring MSGPACK_CONTENT_TYPE get msgpack instead when it is
+installed; they have to accept json as well, e.g.
+'application/x-msgpack, application/json;q=0.5', or pecan refuses the
+request. hooks.ResponseEncodingHook then compresses the body and
+reports its size and encode time to metrics.
+'''
+
+from datetime import date, datetime
+import json
+import time
+
+import pecan
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+
+# environ key of the details of rendered response
+ENVIRON_KEY = 'ostf.encoding'
+# environ key of ETag of rendered response
+ETAG_ENVIRON_KEY = 'ostf.etag'
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        # same format as pecan.jsonify gives
+        return str(obj)
+    if hasattr(obj, '__json__'):
+        return obj.__json__()
+    raise TypeError('{0!r} is not JSON serializable'.format(obj))
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+
+def dumps(obj):
+    return _encoder.encode(obj)
+
+
+def packb(obj):
+    return msgpack.packb(obj, default=_default)
+
+
+def negotiate(request):
+    '''Returns content type of the response to given request.'''
+    if (msgpack is None or
+            MSGPACK_CONTENT_TYPE not in request.headers.get('Accept', '')):
+        return JSON_CONTENT_TYPE
+    return request.accept.best_match(
+        [JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE])
+
+
+class JsonRenderer(object):
+
+    def __init__(self, path, extra_vars):
+        pass
+
+    def render(self, template_path, namespace):
+        start = time.time()
+        content_type = negotiate(pecan.request)
+        if content_type == MSGPACK_CONTENT_TYPE:
+            body = packb(namespace)
+        else:
+            body = dumps(namespace)
+        pecan.request.environ[ENVIRON_KEY] = {
+            'content_type': content_type,
+            'encode_time': time.time() - start
+        }
+        return body
@@ -28,6 +28,7 @@ class V1Controller(object):
 
 class RootController(object):
     v1 = V1Controller()
+    metrics = controllers.MetricsController()
 
     @expose('json', generic=True)
     def index(self):
@@ -20,10 +20,16 @@ import time
 class TestingAdapterClient(object):
     def __init__(self, url):
         self.url = url
+        # url -> last response of GET carrying ETag
+        self._responses = {}
 
     def _request(self, method, url, data=None):
         headers = {'content-type': 'application/json'}
 
+        cached = self._responses.get(url) if method == 'GET' else None
+        if cached is not None:
+            headers['If-None-Match'] = cached.headers['ETag']
+
         r = requests.request(
             method,
             url,
@@ -32,6 +38,11 @@ class TestingAdapterClient(object):
             timeout=30.0
         )
 
+        if r.status_code == 304 and cached is not None:
+            return cached
+        if method == 'GET' and r.ok and 'ETag' in r.headers:
+            self._responses[url] = r
+
         if 2 != r.status_code / 100:
             raise AssertionError(
                 '{method} "{url}" responded with '
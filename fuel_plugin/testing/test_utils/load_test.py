@@ -0,0 +1,110 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Measures how read endpoints of the adapter scale with concurrent clients.
+
+Every endpoint asks Nailgun for the cluster, so start the mimic with
+injected latency and the adapter once without and once with --green-io:
+
+    NAILGUN_MIMIC_LATENCY=0.2 python \
+        fuel_plugin/testing/test_utils/nailgun_mimic.py
+    ostf-server --nailgun-port=8000 [--green-io] \
+        --debug_tests=fuel_plugin/testing/fixture/dummy_tests
+    python fuel_plugin/testing/test_utils/load_test.py
+
+Throughput of the blocking server stays at about 1 / latency requests
+per second whatever the concurrency, the cooperative one grows with it.
+'''
+
+import argparse
+import threading
+import time
+
+import requests
+
+
+ENDPOINTS = ('/v1/testsets/{cluster}',
+             '/v1/tests/{cluster}',
+             '/v1/testruns/last/{cluster}')
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_level(url, cluster, concurrency, requests_count):
+    '''
+    Sends requests_count GETs spread over endpoints from concurrency
+    threads. Returns dict with throughput and latencies in seconds.
+    '''
+    paths = [url + ENDPOINTS[i % len(ENDPOINTS)].format(cluster=cluster)
+             for i in range(requests_count)]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                if not paths:
+                    return
+                path = paths.pop()
+            start = time.time()
+            try:
+                session.get(path).raise_for_status()
+            except requests.RequestException as exc:
+                errors.append(exc)
+            latencies.append(time.time() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    return {
+        'concurrency': concurrency,
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'errors': len(errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8777')
+    parser.add_argument('--cluster', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 5, 10, 20, 50])
+    parser.add_argument('--requests', type=int, default=100,
+                        help='requests sent at every concurrency level')
+    args = parser.parse_args()
+
+    print '{0:>12}{1:>12}{2:>10}{3:>10}{4:>8}'.format(
+        'concurrency', 'req/s', 'p50', 'p95', 'errors')
+    for concurrency in args.concurrency:
+        result = run_level(args.url, args.cluster,
+                           concurrency, args.requests)
+        print ('{concurrency:>12}{throughput:>12.1f}{p50:>10.3f}'
+               '{p95:>10.3f}{errors:>8}'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Compares test name lookup of fuel_health log records.
+
+Measures LOG.debug through TestsAdapter called from a stack as deep
+as the one of a test run by nose, once with the test name found by
+inspecting the stack and once with the name declared by the runner
+with set_test_name:
+
+    python fuel_plugin/testing/test_utils/log_benchmark.py --records 2000
+'''
+
+import argparse
+import logging
+import os
+import time
+
+from fuel_health.common import log
+
+
+TEST_NAME = 'fuel_health.tests.smoke.test_benchmark.Test.test_log'
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def nested(depth, func):
+    if depth:
+        return nested(depth - 1, func)
+    return func()
+
+
+def run(records, depth, repeat):
+    logger = logging.getLogger('log_benchmark')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    stream = open(os.devnull, 'w')
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(log.TestsFormatter())
+    logger.addHandler(handler)
+    adapter = log.TestsAdapter(logger, 'log_benchmark')
+
+    def write():
+        for i in range(records):
+            adapter.debug('record %s', i)
+
+    results = {}
+    try:
+        # the name has never been declared, as before runners did it
+        log._test_name = log._NOT_SET
+        results['stack'] = timed(lambda: nested(depth, write), repeat)
+
+        log.set_test_name(TEST_NAME)
+        results['declared'] = timed(lambda: nested(depth, write), repeat)
+    finally:
+        log._test_name = log._NOT_SET
+        logger.removeHandler(handler)
+        stream.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=40,
+                        help='frames between the runner and the record')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.records, args.depth, args.repeat)
+    print '{0:<10}{1:>10}{2:>14}'.format('', 'total', 'per record')
+    for name in ('stack', 'declared'):
+        print '{0:<10}{1:>10.3f}{2:>12.1f}us'.format(
+            name, results[name], results[name] / args.records * 10 ** 6)
+
+
+if __name__ == '__main__':
+    main()
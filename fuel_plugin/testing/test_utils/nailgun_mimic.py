@@ -12,7 +12,20 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from bottle import route, run
+import os
+import time
+
+# seconds every response is delayed by, to see how the adapter copes
+# with slow Nailgun
+LATENCY = float(os.environ.get('NAILGUN_MIMIC_LATENCY', 0))
+PORT = int(os.environ.get('NAILGUN_MIMIC_PORT', 8000))
+
+if LATENCY:
+    # delayed requests have to be served concurrently
+    from gevent import monkey
+    monkey.patch_all()
+
+from bottle import hook, route, run
 
 
 cluster_fixture = {
@@ -96,19 +109,32 @@ cluster_fixture = {
 }
 
 
+def get_cluster(id):
+    # clusters not in fixture, e.g. created by benchmark,
+    # look like the first one
+    return cluster_fixture.get(id, cluster_fixture[1])
+
+
+@hook('before_request')
+def delay():
+    if LATENCY:
+        time.sleep(LATENCY)
+
+
 @route('/api/clusters/<id:int>')
 def serve_cluster_meta(id):
-    return cluster_fixture[id]['cluster_meta']
+    return get_cluster(id)['cluster_meta']
 
 
 @route('/api/releases/<id:int>')
 def serve_cluster_release_info(id):
-    return cluster_fixture[id]['release_data']
+    return get_cluster(id)['release_data']
 
 
 @route('/api/clusters/<id:int>/attributes')
 def serve_cluster_attributes(id):
-    return cluster_fixture[id]['cluster_attributes']
+    return get_cluster(id)['cluster_attributes']
 
 
-run(host='localhost', port=8000, debug=True)
+run(host='localhost', port=PORT, debug=True,
+    server='gevent' if LATENCY else 'wsgiref')
@@ -0,0 +1,83 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest2
+
+
+# patching is process wide, so the server runs in its own interpreter
+SERVER = '''
+import os
+import sys
+import pecan
+from fuel_plugin.ostf_adapter import green
+from fuel_plugin.ostf_adapter.nose_plugin import nose_utils
+from fuel_plugin.testing.tests.unit.test_green import ThreadedFixture
+
+green.patch()
+pecan.conf.update({'metrics_dir': sys.argv[2]})
+os.waitpid(nose_utils.run_proc(ThreadedFixture().run, sys.argv[1]).pid, 0)
+'''
+
+
+class ThreadedFixture(object):
+    '''Reads socket from a thread, as paramiko transports do.'''
+
+    def run(self, path):
+        reader, writer = socket.socketpair()
+        received = []
+
+        def read():
+            try:
+                received.append(reader.recv(5))
+            except Exception as e:
+                received.append(repr(e))
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        # reader is waiting already
+        time.sleep(0.5)
+        writer.sendall('hello')
+        thread.join(10)
+        with open(path, 'w') as f:
+            f.write(received[0] if received else 'timeout')
+
+
+class TestGreenTestRuns(unittest2.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_threaded_fixture(self):
+        path = os.path.join(self.directory, 'result')
+        subprocess.check_call([sys.executable, '-c', SERVER, path,
+                               os.path.join(self.directory, 'metrics')],
+                              env=dict(os.environ,
+                                       PYTHONPATH=os.pathsep.join(sys.path)))
+
+        deadline = time.time() + 30
+        while not os.path.exists(path) and time.time() < deadline:
+            time.sleep(0.1)
+        with open(path) as f:
+            self.assertEqual(f.read(), 'hello')
@@ -0,0 +1,96 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import unittest2
+
+from fuel_health.common import inventory
+
+
+class Image(object):
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+class ImageManager(object):
+
+    def __init__(self, images):
+        self.images = images
+        self.calls = 0
+
+    def list(self):
+        self.calls += 1
+        return list(self.images)
+
+    def create_image(self, name):
+        self.images.append(Image(len(self.images) + 1, name))
+
+
+class TestInventory(unittest2.TestCase):
+
+    def setUp(self):
+        self.cache = inventory.Inventory(ttl=300)
+        self.manager = ImageManager([Image(1, 'TestVM'),
+                                     Image(2, 'savanna'),
+                                     Image(3, ' testvm ')])
+
+    def test_ttl(self):
+        with mock.patch('time.time', return_value=1000):
+            self.cache.list('images', self.manager.list)
+            self.cache.list('images', self.manager.list)
+        self.assertEqual(self.manager.calls, 1)
+
+        with mock.patch('time.time', return_value=1301):
+            self.cache.list('images', self.manager.list)
+        self.assertEqual(self.manager.calls, 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_find(self):
+        found = self.cache.find('images', self.manager.list,
+                                'name', 'TestVM')
+        self.assertEqual([image.id for image in found], [1])
+
+        found = self.cache.find('images', self.manager.list,
+                                'name', 'TESTVM', inventory.normalize_name)
+        self.assertEqual([image.id for image in found], [1, 3])
+        self.assertEqual(self.cache.find('images', self.manager.list,
+                                         'name', 'cirros'), [])
+        self.assertEqual(self.manager.calls, 1)
+
+    def test_invalidate(self):
+        self.cache.list('images', self.manager.list)
+        self.cache.list('networks', lambda: [])
+        self.cache.invalidate('images')
+        self.cache.list('images', self.manager.list)
+        self.assertEqual(self.manager.calls, 2)
+
+        self.cache.invalidate()
+        self.cache.list('images', self.manager.list)
+        self.assertEqual(self.manager.calls, 3)
+
+    def test_watch(self):
+        self.cache.watch(self.manager, 'images', methods=('create_image',))
+        # watching twice wraps the method once
+        self.cache.watch(self.manager, 'images', methods=('create_image',))
+        self.assertEqual(self.cache.find('images', self.manager.list,
+                                         'name', 'snapshot'), [])
+
+        self.manager.create_image('snapshot')
+
+        found = self.cache.find('images', self.manager.list,
+                                'name', 'snapshot')
+        self.assertEqual([image.id for image in found], [4])
+        self.assertEqual(self.manager.calls, 2)
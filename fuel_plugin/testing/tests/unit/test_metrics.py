@@ -0,0 +1,62 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+import unittest2
+
+from fuel_plugin.ostf_adapter import metrics
+
+
+class TestMetrics(unittest2.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        metrics.configure(self.directory, reset=True)
+        metrics._samples.clear()
+
+    def tearDown(self):
+        metrics.DIRECTORY = None
+        metrics._samples.clear()
+        shutil.rmtree(self.directory)
+
+    def test_render(self):
+        metrics.inc('ostf_test_results_total', status='success')
+        metrics.inc('ostf_test_results_total', status='success')
+        metrics.observe('ostf_test_duration_seconds', 1.5, test_set='a"b')
+
+        text = metrics.render(metrics.collect())
+        self.assertIn('# TYPE ostf_test_duration_seconds summary', text)
+        self.assertIn('ostf_test_results_total{status="success"} 2.0', text)
+        self.assertIn('ostf_test_duration_seconds_sum{test_set="a\\"b"} 1.5',
+                      text)
+
+    def test_collect_merges_exited_processes(self):
+        metrics.inc('ostf_test_runs_started_total')
+        # flushed by test run process which has exited since
+        exited = metrics._samples.copy()
+        metrics._dump(os.path.join(self.directory, '999999999-1.json'),
+                      exited)
+
+        samples = metrics.collect()
+        self.assertEqual(
+            samples[('ostf_test_runs_started_total', ())], 2)
+        own = '{0}-{1}.json'.format(os.getpid(),
+                                    metrics._state['started_at'])
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         sorted(['.lock', metrics.MERGED, own]))
+        # merged counts are not lost
+        self.assertEqual(
+            metrics.collect()[('ostf_test_runs_started_total', ())], 2)
@@ -0,0 +1,69 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from datetime import datetime
+import json
+import unittest2
+import zlib
+
+import pecan
+from webob import Request
+
+from fuel_plugin.ostf_adapter import metrics
+from fuel_plugin.ostf_adapter.wsgi import hooks, renderers
+
+
+class RootController(object):
+
+    @pecan.expose('json')
+    def testrun(self):
+        return {'started_at': datetime(2014, 3, 20, 12, 30),
+                'message': 'x' * 2048}
+
+
+class TestResponseEncoding(unittest2.TestCase):
+
+    def setUp(self):
+        metrics._samples.clear()
+        self.app = pecan.make_app(
+            RootController(),
+            custom_renderers={'json': renderers.JsonRenderer},
+            hooks=[hooks.ResponseEncodingHook(min_size=1024)])
+
+    def tearDown(self):
+        metrics._samples.clear()
+
+    def _get(self, **headers):
+        return Request.blank('/testrun', headers=headers)\
+            .get_response(self.app)
+
+    def test_plain(self):
+        response = self._get()
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(json.loads(response.body)['started_at'],
+                         '2014-03-20 12:30:00')
+
+    def test_gzip(self):
+        response = self._get(**{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertEqual(response.content_type, 'application/json')
+        body = zlib.decompress(response.body, 16 + zlib.MAX_WBITS)
+        self.assertEqual(json.loads(body)['message'], 'x' * 2048)
+
+        labels = (('endpoint', 'RootController.testrun'),)
+        samples = metrics._registry()
+        self.assertEqual(
+            samples[('ostf_response_size_bytes_count', labels)], 1)
+        self.assertTrue(samples[('ostf_response_sent_bytes_sum', labels)] <
+                        samples[('ostf_response_size_bytes_sum', labels)])
@@ -0,0 +1,65 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+import unittest2
+
+import mock
+
+from fuel_plugin.ostf_adapter.storage import retention
+
+
+TestRunRow = namedtuple(
+    'TestRunRow', 'id cluster_id test_set_id status started_at')
+
+
+class TestRetentionPolicies(unittest2.TestCase):
+
+    def setUp(self):
+        self.now = datetime(2014, 3, 20)
+        self.session = mock.Mock()
+
+    def _find_expired(self, rows, policies):
+        self.session.query.return_value.order_by.return_value = rows
+        return retention.find_expired(self.session, policies, self.now)
+
+    def test_parse(self):
+        policy = retention.Policy.parse('general_test:*:7:10')
+        self.assertTrue(policy.matches('general_test', 1))
+        self.assertFalse(policy.matches('ha', 1))
+        self.assertEqual((policy.max_age, policy.max_count), (7, 10))
+        self.assertRaises(ValueError, retention.Policy.parse, 'ha:1:7')
+
+    def test_count_limit_keeps_running_test_runs(self):
+        rows = [
+            TestRunRow(4, 1, 'ha', 'finished', self.now),
+            TestRunRow(3, 1, 'ha', 'finished', self.now),
+            TestRunRow(2, 1, 'ha', 'running', self.now),
+            TestRunRow(1, 1, 'ha', 'finished', self.now),
+            TestRunRow(5, 2, 'ha', 'finished', self.now),
+        ]
+        policies = retention.get_policies([], max_count=1)
+        self.assertEqual(self._find_expired(rows, policies), [3, 1])
+
+    def test_age_limit_keeps_last_test_run(self):
+        old = self.now - timedelta(days=10)
+        rows = [
+            TestRunRow(3, 1, 'ha', 'finished', old),
+            TestRunRow(2, 1, 'ha', 'finished', old),
+            TestRunRow(1, 1, 'smoke', 'finished', old),
+            TestRunRow(0, 1, 'smoke', 'finished', old),
+        ]
+        policies = retention.get_policies(['smoke:1:30:0'], max_age=7)
+        self.assertEqual(self._find_expired(rows, policies), [2])
@@ -0,0 +1,57 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+
+from mock import patch
+import pecan
+from sqlalchemy import create_engine
+from webob import Request
+
+from fuel_plugin.ostf_adapter.wsgi import hooks
+
+
+engine = create_engine('sqlite://')
+
+
+class RootController(object):
+
+    @pecan.expose('json')
+    def tests(self):
+        engine.execute('SELECT 1')
+        engine.execute('SELECT 2')
+        return {}
+
+
+class TestSQLProfilingHook(unittest.TestCase):
+
+    def _get(self, slow_threshold):
+        app = pecan.make_app(
+            RootController(),
+            hooks=[hooks.SQLProfilingHook(engine, slow_threshold)])
+        return Request.blank('/tests').get_response(app)
+
+    def test_headers(self):
+        with patch.object(hooks.SLOW_REQUESTS_LOG, 'warning') as warning:
+            response = self._get(slow_threshold=60)
+        self.assertEqual(response.headers['X-Query-Count'], '2')
+        self.assertTrue(float(response.headers['X-DB-Time']) >= 0)
+        self.assertFalse(warning.called)
+
+    def test_slow_request_is_logged(self):
+        with patch.object(hooks.SLOW_REQUESTS_LOG, 'warning') as warning:
+            self._get(slow_threshold=0.000001)
+        message = warning.call_args[0][-1]
+        self.assertIn('SELECT 1', message)
+        self.assertIn('SELECT 2', message)
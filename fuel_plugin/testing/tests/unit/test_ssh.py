@@ -0,0 +1,123 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import unittest2
+
+from fuel_health.common import ssh
+
+
+class FakeChannel(object):
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSSHClient(object):
+
+    def __init__(self):
+        self.transport = mock.Mock()
+        self.transport.is_active.return_value = True
+        self.transport.open_channel.side_effect = \
+            lambda *args: FakeChannel()
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+        self.transport.is_active.return_value = False
+
+
+class TestConnectionPool(unittest2.TestCase):
+
+    def setUp(self):
+        self.pool = ssh.ConnectionPool(max_idle=300, keepalive=0)
+        self.clients = []
+
+    def connect(self):
+        client = FakeSSHClient()
+        self.clients.append(client)
+        return client
+
+    def test_reuse(self):
+        first = self.pool.open_channel('node-1', self.connect)
+        second = self.pool.open_channel('node-1', self.connect)
+        self.pool.open_channel('node-2', self.connect)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.clients), 2)
+        self.assertEqual(self.clients[0].transport.open_channel.call_count,
+                         2)
+
+    def test_reconnect_dead_transport(self):
+        self.pool.get_transport('node-1', self.connect)
+        self.clients[0].transport.is_active.return_value = False
+
+        transport = self.pool.get_transport('node-1', self.connect)
+
+        self.assertEqual(len(self.clients), 2)
+        self.assertTrue(self.clients[0].closed)
+        self.assertIs(transport, self.clients[1].transport)
+
+    def test_evict_idle(self):
+        with mock.patch('time.time', return_value=1000):
+            self.pool.get_transport('node-1', self.connect)
+        with mock.patch('time.time', return_value=1301):
+            self.pool.get_transport('node-2', self.connect)
+
+        self.assertTrue(self.clients[0].closed)
+        self.assertFalse(self.clients[1].closed)
+
+    def test_keep_connection_with_open_channel(self):
+        with mock.patch('time.time', return_value=1000):
+            channel = self.pool.open_channel('node-1', self.connect)
+        with mock.patch('time.time', return_value=1301):
+            self.pool.get_transport('node-2', self.connect)
+        self.assertFalse(self.clients[0].closed)
+
+        channel.close()
+        # idle time counts from the check that found it in use
+        with mock.patch('time.time', return_value=1500):
+            self.pool.get_transport('node-2', self.connect)
+        self.assertFalse(self.clients[0].closed)
+        with mock.patch('time.time', return_value=1602):
+            self.pool.get_transport('node-2', self.connect)
+        self.assertTrue(self.clients[0].closed)
+
+
+class TestExecCommandStream(unittest2.TestCase):
+
+    def _stream(self, chunks, **kwargs):
+        client = ssh.Client('node-1', 'root')
+        channel = mock.Mock()
+        channel.recv_exit_status.return_value = 0
+        with mock.patch.object(client, '_start_command',
+                               return_value=channel):
+            with mock.patch.object(client, '_read_channel',
+                                   return_value=[(chunk, None)
+                                                 for chunk in chunks]):
+                return list(client.exec_command_stream('cmd', **kwargs))
+
+    def test_lines(self):
+        self.assertEqual(self._stream(['a\nb', 'c\nd'], lines=True),
+                         ['a\n', 'bc\n', 'd'])
+
+    def test_lines_with_crlf_split_between_chunks(self):
+        self.assertEqual(self._stream(['a\r', '\nb\r\n'], lines=True),
+                         ['a\r\n', 'b\r\n'])
@@ -0,0 +1,101 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest2
+
+from fuel_health.common import log as tests_log
+from fuel_plugin.ostf_adapter.storage import test_logs
+
+
+class TestTestLogHandler(unittest2.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.handler = test_logs.TestLogHandler(self.log_dir, 1,
+                                                max_bytes=1024,
+                                                flush_interval=0)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger = logging.getLogger('test_logs')
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+        tests_log.set_test_name(None)
+        shutil.rmtree(self.log_dir)
+
+    def _read(self, test_name, *args):
+        path = test_logs.find_segment(self.log_dir, 1, test_name)
+        return ''.join(test_logs.read_segment(path, *args))
+
+    def test_records_are_routed_per_test(self):
+        self.logger.info('outside of tests')
+        tests_log.set_test_name('tests.Test.test_first')
+        self.logger.info('first')
+        tests_log.set_test_name('tests.Test.test_second')
+        self.logger.info('second')
+
+        self.assertEqual(self._read('tests.Test.test_first'), 'first\n')
+        # segment of running test is readable up to the last flush
+        self.assertEqual(self._read('tests.Test.test_second'), 'second\n')
+
+        self.handler.close()
+        path = test_logs.find_segment(self.log_dir, 1,
+                                      'tests.Test.test_second')
+        self.assertEqual(test_logs.segment_size(path), len('second\n'))
+        self.assertEqual(self._read('tests.Test.test_second', 2, 5),
+                         'con')
+
+    def test_segment_size_is_limited(self):
+        tests_log.set_test_name('tests.Test.test_verbose')
+        for i in range(100):
+            self.logger.info('x' * 100)
+        self.handler.close()
+
+        content = self._read('tests.Test.test_verbose')
+        self.assertTrue(content.endswith(
+            test_logs.TRUNCATED_MESSAGE % 1024))
+        self.assertTrue(len(content) < 1024 + 100)
+
+    def test_remove_stale(self):
+        tests_log.set_test_name('tests.Test.test_first')
+        self.logger.info('first')
+        self.handler.close()
+
+        test_logs.remove_stale(self.log_dir, [1])
+        self.assertTrue(os.path.isdir(test_logs.run_dir(self.log_dir, 1)))
+        test_logs.remove_stale(self.log_dir, [2])
+        self.assertFalse(os.path.isdir(test_logs.run_dir(self.log_dir, 1)))
+
+    def test_remove(self):
+        tests_log.set_test_name('tests.Test.test_first')
+        self.logger.info('first')
+        self.handler.close()
+
+        self.assertEqual(test_logs.remove(self.log_dir, [2]), 0)
+        self.assertTrue(os.path.isdir(test_logs.run_dir(self.log_dir, 1)))
+        self.assertTrue(test_logs.remove(self.log_dir, [1]) > 0)
+        self.assertFalse(os.path.isdir(test_logs.run_dir(self.log_dir, 1)))
+
+    def test_find_segment_rejects_paths(self):
+        self.assertIsNone(
+            test_logs.find_segment(self.log_dir, 1, '../etc/passwd'))
+        self.assertIsNone(
+            test_logs.find_segment(self.log_dir, '1/..', 'tests.Test'))
@@ -14,8 +14,9 @@
 
 import json
 from mock import patch, Mock
+from webob import Response
 
-from fuel_plugin.ostf_adapter.wsgi import controllers
+from fuel_plugin.ostf_adapter.wsgi import controllers, renderers
 from fuel_plugin.ostf_adapter.storage import models
 
 from fuel_plugin.testing.tests.unit import base
@@ -273,3 +274,59 @@ class TestClusterRedeployment(base.BaseWSGITest):
             self.controller.get(self.expected['cluster']['id'])
 
         self.assertTrue(self.is_background_working)
+
+
+class TestConditionalGet(TestTestRunsController):
+
+    def setUp(self):
+        super(TestConditionalGet, self).setUp()
+        self.test_run = self.controller.post()[0]
+        self.session.commit()
+
+    def _get(self, get, arg, if_none_match=()):
+        self.request_mock.environ = {}
+        self.request_mock.if_none_match = set(if_none_match)
+        res = get(arg)
+        return res, self.request_mock.environ.get(renderers.ETAG_ENVIRON_KEY)
+
+    def _assert_conditional(self, get, arg):
+        res, etag = self._get(get, arg)
+        self.assertNotIsInstance(res, Response)
+        self.assertIsNotNone(etag)
+
+        depl_tags_mock = Mock()
+        with patch(
+            'fuel_plugin.ostf_adapter.mixins._get_cluster_depl_tags',
+            depl_tags_mock
+        ):
+            res, _ = self._get(get, arg, [etag])
+        self.assertIsInstance(res, Response)
+        self.assertEqual(res.status_int, 304)
+        self.assertEqual(res.headers['ETag'], 'W/"%s"' % etag)
+        self.assertFalse(depl_tags_mock.called)
+
+        res, other_etag = self._get(get, arg, ['mismatch'])
+        self.assertNotIsInstance(res, Response)
+        self.assertEqual(other_etag, etag)
+
+        with patch.object(renderers, 'negotiate',
+                          lambda request: renderers.MSGPACK_CONTENT_TYPE):
+            res, other_etag = self._get(get, arg, [etag])
+        self.assertNotIsInstance(res, Response)
+        self.assertNotEqual(other_etag, etag)
+
+    def test_testsets(self):
+        self._assert_conditional(controllers.TestsetsController().get,
+                                 self.expected['cluster']['id'])
+
+    def test_tests(self):
+        self._assert_conditional(controllers.TestsController().get,
+                                 self.expected['cluster']['id'])
+
+    def test_testrun(self):
+        self._assert_conditional(self.controller.get_one,
+                                 self.test_run['id'])
+
+    def test_last_testruns(self):
+        self._assert_conditional(self.controller.get_last,
+                                 self.expected['cluster']['id'])
@@ -74,7 +74,7 @@ class WsgiInterfaceTests(base.BaseWSGITest):
         ]
 
         self.request_mock.body = json.dumps(testruns)
-        models.TestRun.start.return_value = {}
+        models.TestRun.start_many.return_value = [{}, {}]
         self.app.post_json('/v1/testruns', testruns)
 
     def test_put_testruns(self):